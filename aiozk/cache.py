@@ -0,0 +1,226 @@
+import collections
+from typing import ClassVar
+
+from aiozk import protocol
+
+
+class LRUCache:
+    """
+    Mapping of at most ``max_size`` entries taking up at most ``max_bytes``
+    in total, evicting the least recently used entries first.
+
+    A ``max_size`` of 0 disables the cache, None lifts the bound.  An entry
+    larger than ``max_bytes`` is not stored.
+
+    Contains attributes:
+
+    - **bytes** Total size of the entries, as given to `set()`.
+    - **hits**, **misses** Number of lookups that found an entry or not.
+    - **evictions** Number of entries evicted to make room for others.
+    """
+
+    def __init__(self, max_size=None, max_bytes=None):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.sizes = {}
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_size != 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, size=0):
+        """
+        Stores an entry of ``size`` bytes, returns False if it is not stored.
+        """
+        self.pop(key)
+        if not self.enabled or (self.max_bytes is not None and size > self.max_bytes):
+            return False
+
+        self.entries[key] = value
+        if size:
+            self.sizes[key] = size
+            self.bytes += size
+
+        while (self.max_size is not None and len(self.entries) > self.max_size) or (
+            self.max_bytes is not None and self.bytes > self.max_bytes
+        ):
+            evicted_key, evicted = self.entries.popitem(last=False)
+            self.bytes -= self.sizes.pop(evicted_key, 0)
+            self.evictions += 1
+            self.evicted(evicted_key, evicted)
+        return True
+
+    def evicted(self, key, value):
+        """
+        Called with every evicted entry.
+        """
+
+    def pop(self, key, default=None):
+        self.bytes -= self.sizes.pop(key, 0)
+        return self.entries.pop(key, default)
+
+    def clear(self):
+        self.entries.clear()
+        self.sizes.clear()
+        self.bytes = 0
+
+    def stats(self):
+        """
+        Returns a dict with the size of the cache and its counters.
+        """
+        return {
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class StatCache(LRUCache):
+    """
+    Last known ``Stat`` of znodes, keyed by their normalized path.
+
+    The versions are used as optimistic locks by `aiozk.ZKClient.delete()`,
+    `aiozk.ZKClient.set_data()` and `aiozk.ZKClient.set_acl()`.  An entry
+    is dropped when a watch event reports a change of its znode.
+    """
+
+    def event_received(self, event):
+        self.pop(event.path)
+
+
+class WatchedCache(LRUCache):
+    """
+    Cache of read results keyed by ``(kind, path)``, every entry is fetched
+    with a watch that invalidates it on the ``EVENT_TYPES`` of its kind.
+
+    The cache registers a callback with the session for each entry so that
+    the watch is restored on reconnect, and removed from the server once
+    the entry is evicted.  A fetch invalidated before its reply is
+    processed is not stored.
+    """
+
+    EVENT_TYPES: ClassVar = {}
+
+    def __init__(self, session, max_size=None, max_bytes=None):
+        super().__init__(max_size, max_bytes)
+        self.session = session
+        # number of fetches in flight per key
+        self.fetching = collections.Counter()
+        # keys invalidated while being fetched
+        self.stale = set()
+
+    @staticmethod
+    def sizeof(kind, value):
+        return 0
+
+    def watch(self, key):
+        kind, path = key
+        for event_type in self.EVENT_TYPES[kind]:
+            self.session.add_watch_callback(event_type, path, self.watched)
+
+    def unwatch(self, key):
+        kind, path = key
+        for event_type in self.EVENT_TYPES[kind]:
+            self.session.remove_watch_callback(event_type, path, self.watched)
+
+    @staticmethod
+    def watched(path):
+        # the entries are invalidated by `event_received()`, which sees the
+        # event before any callback
+        pass
+
+    def fetch_started(self, key):
+        if not self.fetching[key] and key not in self.entries:
+            self.watch(key)
+        self.fetching[key] += 1
+
+    def fetch_done(self, key, value=None):
+        """
+        Stores the fetched value unless it is None, i.e. there is nothing
+        to cache, or the entry was invalidated meanwhile.
+        """
+        self.fetching[key] -= 1
+        if value is not None and key not in self.stale:
+            self.set(key, value, self.sizeof(key[0], value))
+        if not self.fetching[key]:
+            del self.fetching[key]
+            self.stale.discard(key)
+            if key not in self.entries:
+                self.unwatch(key)
+
+    def invalidate(self, key):
+        if key in self.fetching:
+            self.stale.add(key)
+        if self.pop(key) is not None and key not in self.fetching:
+            self.unwatch(key)
+
+    def evicted(self, key, value):
+        if key not in self.fetching:
+            self.unwatch(key)
+
+    def event_received(self, event):
+        for kind, event_types in self.EVENT_TYPES.items():
+            if event.type in event_types:
+                self.invalidate((kind, event.path))
+
+
+class DataCache(WatchedCache):
+    """
+    Results of `aiozk.ZKClient.get()` and `aiozk.ZKClient.get_children()`,
+    the kind of an entry is ``DATA`` or ``CHILDREN``.
+    """
+
+    DATA = 'data'
+    CHILDREN = 'children'
+
+    EVENT_TYPES: ClassVar = {
+        DATA: (protocol.WatchEvent.DATA_CHANGED, protocol.WatchEvent.DELETED),
+        CHILDREN: (protocol.WatchEvent.CHILDREN_CHANGED, protocol.WatchEvent.DELETED),
+    }
+
+    @staticmethod
+    def sizeof(kind, value):
+        if kind == DataCache.CHILDREN:
+            return sum(len(child) for child in value)
+        data, _ = value
+        return len(data) if data else 0
+
+
+class ExistsCache(WatchedCache):
+    """
+    Paths found missing by `aiozk.ZKClient.exists()`, the kind of an entry
+    is ``MISSING``.  The exists watch invalidates the entry when the znode
+    is created.
+    """
+
+    MISSING = 'missing'
+
+    EVENT_TYPES: ClassVar = {
+        MISSING: (protocol.WatchEvent.CREATED,),
+    }
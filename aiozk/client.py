@@ -1,16 +1,93 @@
 import asyncio
+import collections
+import functools
+import itertools
 import logging
+from contextlib import suppress
 
 from aiozk import exc, protocol
 
+from .cache import DataCache, ExistsCache, LRUCache, StatCache
 from .features import Features
+from .metrics import Metrics
 from .recipes.proxy import RecipeProxy
 from .session import Session
-from .transaction import Transaction
+from .transaction import ReadTransaction, Transaction
 
 
 log = logging.getLogger(__name__)
 
+# default number of requests kept in flight by the bulk read methods
+DEFAULT_BULK_CONCURRENCY = 256
+
+# default number of znodes whose last known stat is kept
+DEFAULT_STAT_CACHE_SIZE = 10000
+
+STALE_STAT_ERROR_CODES = (exc.NoNode.error_code, exc.BadVersion.error_code)
+
+# number of ancestors of the paths given to `ZKClient.ensure_path()` known
+# to exist, a stale entry only costs a failed transaction
+KNOWN_PATHS_CACHE_SIZE = 1000
+
+# upper bound of the paths deleted by `ZKClient.deleteall()` in one
+# transaction, well below the default 1MB packet limit
+DELETE_BATCH_MAX_BYTES = 128 * 1024
+
+
+class GetResult(collections.namedtuple('GetResult', 'data stat error_code')):
+    """
+    Result of `ZKClient.try_get()`, an ``error_code`` of 0 means success.
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return not self.error_code
+
+    @property
+    def error(self):
+        """
+        The exception class of the error, None on success.
+        """
+        if not self.error_code:
+            return None
+        return exc.response_error_xref.get(self.error_code, exc.UnknownError)
+
+
+def split_paths(paths, max_bytes):
+    """
+    Splits paths into lists taking up at most ``max_bytes`` in a
+    transaction each.
+    """
+    batches = []
+    batch = []
+    size = 0
+    for path in paths:
+        # multi header, path and version
+        path_size = 17 + len(path.encode('utf-8'))
+        if batch and size + path_size > max_bytes:
+            batches.append(batch)
+            batch = []
+            size = 0
+        batch.append(path)
+        size += path_size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def data_result(response):
+    data = response.data
+    if isinstance(data, memoryview):
+        # don't keep the whole receive buffer alive
+        data = bytes(data)
+    return (data, response.stat)
+
+
+def children_result(response):
+    return tuple(response.children)
+
 
 class ZKClient:
     """
@@ -26,6 +103,19 @@ class ZKClient:
         retry_policy=None,
         allow_read_only=False,
         read_timeout=None,
+        zero_copy=False,
+        write_batch_bytes=None,
+        max_in_flight=None,
+        max_buffered_bytes=None,
+        server_version=None,
+        connect_race_delay=None,
+        standby=False,
+        metrics=False,
+        slow_request_threshold=None,
+        stat_cache_size=DEFAULT_STAT_CACHE_SIZE,
+        data_cache_size=0,
+        data_cache_bytes=None,
+        exists_cache_size=0,
     ):
         """
         :param str servers: Server list to which ZKClient tries connecting.
@@ -56,20 +146,117 @@ class ZKClient:
 
         :param float read_timeout: Timeout on reading from Zookeeper server in
             seconds.
+
+        :param bool zero_copy: True if data returned by ``get``/``get_data``
+            may be a read-only ``memoryview`` into the received reply
+            instead of ``bytes``. Saves a copy of every payload, but the view
+            keeps the whole reply alive while it is referenced. Recipes copy
+            the data they keep into ``bytes``.
+
+        :param int write_batch_bytes: Requests sent within one event loop
+            iteration are written to the socket together. A batch is written
+            out early once it reaches this many bytes. Defaults to 64 KiB.
+
+        :param int max_in_flight: Maximum number of requests awaiting a
+            reply at the same time. Further requests are queued in FIFO
+            order. If None, the number is not limited.
+
+        :param int max_buffered_bytes: High-water mark of the socket write
+            buffer. Requests wait for the buffer to drain below it before
+            being sent. If None, the asyncio default is used.
+
+        :param server_version: Zookeeper server version, e.g. ``'3.6.3'``.
+            If given, the ``srvr`` probe connection that is otherwise opened
+            before connecting to a server is skipped. The probe is also
+            skipped when reconnecting to a server that was probed before.
+        :type server_version: str or tuple
+
+        :param float connect_race_delay: If set, connection attempts to
+            several servers are raced when (re)connecting: a new attempt is
+            started every ``connect_race_delay`` seconds or as soon as one
+            fails, and the first usable connection is kept. If None, servers
+            are tried one at a time.
+
+        :param bool standby: If True, a connection to another server of the
+            ensemble is kept open while the session is established. When the
+            current connection is lost, the session is re-established on the
+            standby connection with a single connect request. Requires more
+            than one server.
+
+        :param bool metrics: If True, request counts, errors, latencies and
+            traffic are recorded per opcode, see `stats()`.
+
+        :param float slow_request_threshold: Requests whose reply takes at
+            least this many seconds are logged to the
+            ``aiozk.connection.slow`` logger with their opcode, path, sizes,
+            the number of requests pending when they were sent and the
+            server address. They are also counted in `stats()` if
+            ``metrics`` is True. If None, slow requests are not tracked.
+
+        :param int stat_cache_size: Maximum number of znodes whose last known
+            stat is kept for the versions used by `delete()`, `set_data()`
+            and `set_acl()`, the least recently used are evicted first. 0
+            disables the cache, None lifts the bound.
+
+        :param int data_cache_size: Maximum number of results of `get()`,
+            `get_data()` and `get_children()` served from a local cache, the
+            least recently used are evicted first. A read that is not cached
+            is sent with a watch, which invalidates the cached result when
+            the znode changes. 0 disables the cache, None lifts the bound.
+
+        :param int data_cache_bytes: Maximum total size of the data and
+            children names in the data cache. If None, only
+            ``data_cache_size`` bounds the cache.
+
+        :param int exists_cache_size: Maximum number of paths that
+            `exists()` found missing and keeps answering False for without
+            a request, the least recently used are evicted first. The
+            request finding a path missing sets a watch, which removes the
+            path from the cache when the znode is created. 0 disables the
+            cache, None lifts the bound.
         """
         self.chroot = None
         if chroot:
             self.chroot = self.normalize_path(chroot)
             log.info("Using chroot '%s'", self.chroot)
 
-        self.session = Session(servers, session_timeout, retry_policy, allow_read_only, read_timeout)
+        self.session = Session(
+            servers,
+            session_timeout,
+            retry_policy,
+            allow_read_only,
+            read_timeout,
+            zero_copy=zero_copy,
+            write_batch_bytes=write_batch_bytes,
+            max_in_flight=max_in_flight,
+            max_buffered_bytes=max_buffered_bytes,
+            server_version=server_version,
+            connect_race_delay=connect_race_delay,
+            standby=standby,
+            metrics=Metrics() if metrics else None,
+            slow_request_threshold=slow_request_threshold,
+        )
 
         self.default_acl = default_acl or [protocol.UNRESTRICTED_ACCESS]
 
-        self.stat_cache = {}
+        self.stat_cache = StatCache(stat_cache_size)
+        # normalized paths of znodes known to exist, used by `ensure_path()`
+        self.known_paths = LRUCache(KNOWN_PATHS_CACHE_SIZE)
+        self.session.watches.listeners.append(self.stat_cache.event_received)
+
+        self.data_cache = DataCache(self.session, data_cache_size, data_cache_bytes)
+        if self.data_cache.enabled:
+            self.session.watches.listeners.append(self.data_cache.event_received)
+
+        self.exists_cache = ExistsCache(self.session, exists_cache_size)
+        if self.exists_cache.enabled:
+            self.session.watches.listeners.append(self.exists_cache.event_received)
 
         self.recipes = RecipeProxy(self)
 
+        # wrappers of persistent watch callbacks, keyed by (mode, path, callback)
+        self.persistent_callbacks = {}
+
     def normalize_path(self, path):
         if self.chroot:
             path = '/'.join([self.chroot, path])
@@ -98,19 +285,107 @@ class ZKClient:
         else:
             return Features((0, 0, 0))
 
-    async def send(self, request):
-        response = await self.session.send(request)
+    def stats(self):
+        """
+        Returns a snapshot of the client metrics.
+
+        The ``window`` key holds the state of the in-flight request window,
+        the ``watches`` key the number of watches and callbacks and the
+        ``stat_cache``, ``data_cache`` and ``exists_cache`` keys the size
+        and hit rate of the caches.
+        Per opcode request counts, errors, latency histograms, in-flight
+        gauges, traffic and reconnect counts are only included when the
+        client was created with ``metrics=True``. The snapshot can be
+        rendered for Prometheus with `aiozk.metrics.to_prometheus()`.
+
+        :rtype: dict
+        """
+        stats = {
+            'window': self.session.window.stats(),
+            'watches': self.session.watches.stats(),
+            'stat_cache': self.stat_cache.stats(),
+            'data_cache': self.data_cache.stats(),
+            'exists_cache': self.exists_cache.stats(),
+        }
+        if self.session.metrics is not None:
+            stats.update(self.session.metrics.snapshot())
+        return stats
 
-        if getattr(request, 'path', None) and getattr(response, 'stat', None):
-            self.stat_cache[self.denormalize_path(request.path)] = response.stat
+    @property
+    def hooks(self):
+        """
+        Request lifecycle callbacks, register them with e.g.
+        ``zk.hooks.add('on_response', callback)``.
+
+        :rtype: aiozk.hooks.Hooks
+        """
+        return self.session.hooks
+
+    async def send(self, request):
+        path = getattr(request, 'path', None)
+        try:
+            response = await self.session.send(request)
+        except (exc.NoNode, exc.BadVersion):
+            if path:
+                self.stat_cache.pop(path)
+            raise
+
+        if path:
+            if type(response) is int:
+                if response in STALE_STAT_ERROR_CODES:
+                    self.stat_cache.pop(path)
+            elif getattr(response, 'stat', None):
+                self.stat_cache.set(path, response.stat)
+            elif isinstance(request, protocol.DeleteRequest):
+                self.stat_cache.pop(path)
 
         return response
 
+    async def cached_read(self, kind, request, result):
+        """
+        Returns the cached result of a read, or sends the request with a
+        watch and caches the result returned by ``result(response)``. The
+        error code of the reply is returned for a request with
+        ``error_codes`` set.
+        """
+        key = (kind, request.path)
+        if not request.watch:
+            cached = self.data_cache.get(key)
+            if cached is not None:
+                return cached
+
+        request.watch = True
+        value = None
+        self.data_cache.fetch_started(key)
+        try:
+            response = await self.send(request)
+            if type(response) is int:
+                return response
+            value = result(response)
+        finally:
+            self.data_cache.fetch_done(key, value)
+        return value
+
+    def cached_version(self, path, force):
+        if force:
+            return -1
+        stat = self.stat_cache.get(path)
+        if stat is None:
+            return -1
+        return stat.version
+
     async def close(self):
         """Close Zookeeper session and await for session closed."""
         await self.session.close()
 
     def wait_for_events(self, event_types, path):
+        """
+        Returns a future resolved by the first of the events at the path.
+
+        The callbacks are removed once the future is done, also when it is
+        cancelled, e.g. by a timeout, and the watch is removed from the
+        server when nothing else listens to it.
+        """
         path = self.normalize_path(path)
 
         loop = asyncio.get_running_loop()
@@ -119,14 +394,81 @@ class ZKClient:
         def set_future(_):
             if not f.done():
                 f.set_result(None)
+
+        def remove_callbacks(_):
             for event_type in event_types:
                 self.session.remove_watch_callback(event_type, path, set_future)
 
         for event_type in event_types:
             self.session.add_watch_callback(event_type, path, set_future)
+        f.add_done_callback(remove_callbacks)
 
         return f
 
+    async def add_watch(self, path, callback, recursive=False):
+        """
+        Add a persistent watch with a callback to the znode at the path.
+
+        Unlike the watches set by ``watch=True``, a persistent watch stays
+        in place after it is triggered and is restored on reconnect, so no
+        event is missed between re-arming it. Requires Zookeeper 3.6.0 or
+        later.
+
+        :param str path: Path of znode, it doesn't need to exist
+
+        :param callback: Called with the event type (e.g.
+            ``WatchEvent.DATA_CHANGED``) and the path of every event
+
+        :param bool recursive: True for watching all descendants of the
+            znode too. Recursive watches don't trigger on
+            ``WatchEvent.CHILDREN_CHANGED``, the creation and deletion of
+            descendants is reported instead.
+
+        :raises ValueError: When the *persistent_watches* feature is not
+            supported by Zookeeper server (< 3.6.0)
+        """
+        if not self.features.persistent_watches:
+            raise ValueError('Cannot add persistent watch, feature unavailable.')
+
+        path = self.normalize_path(path)
+        if recursive:
+            mode = protocol.AddWatchRequest.PERSISTENT_RECURSIVE
+        else:
+            mode = protocol.AddWatchRequest.PERSISTENT
+
+        key = (mode, path, callback)
+        if key not in self.persistent_callbacks:
+
+            def on_event(event):
+                callback(event.type, self.denormalize_path(event.path))
+
+            self.persistent_callbacks[key] = on_event
+            self.session.add_persistent_watch(mode, path, on_event)
+
+        await self.send(protocol.AddWatchRequest(path=path, mode=mode))
+
+    def remove_watch(self, path, callback, recursive=False):
+        """
+        Remove a callback added with `add_watch()`.
+
+        The watch is removed from the server along with its last callback.
+
+        :param str path: Path of znode
+
+        :param callback: Callback passed to `add_watch()`
+
+        :param bool recursive: Same value as passed to `add_watch()`
+        """
+        path = self.normalize_path(path)
+        if recursive:
+            mode = protocol.AddWatchRequest.PERSISTENT_RECURSIVE
+        else:
+            mode = protocol.AddWatchRequest.PERSISTENT
+
+        on_event = self.persistent_callbacks.pop((mode, path, callback), None)
+        if on_event is not None:
+            self.session.remove_persistent_watch(mode, path, on_event)
+
     async def exists(self, path, watch=False):
         """
         Check whether the path exists.
@@ -138,13 +480,53 @@ class ZKClient:
         :return: True if it exists otherwise False
         :rtype: bool
         """
+        return await self.exists_stat(path, watch=watch) is not None
+
+    async def exists_stat(self, path, watch=False):
+        """
+        Get the stat of a znode if it exists.
+
+        Unlike `get()`, a missing znode is reported without raising and
+        catching an exception.
+
+        :param str path: Path of znode
+
+        :param bool watch: If True, a watch is set as a side effect
+
+        :return: Stat of znode, or None if it does not exist
+        :rtype: aiozk.protocol.stat.Stat
+        """
         path = self.normalize_path(path)
+        if self.exists_cache.enabled and not watch:
+            response = await self.cached_exists(path)
+        else:
+            request = protocol.ExistsRequest(path=path, watch=watch)
+            request.error_codes = True
+            response = await self.send(request)
+
+        if type(response) is int:
+            if response == exc.NoNode.error_code:
+                return None
+            raise exc.get_response_error(response)
+        return response.stat
+
+    async def cached_exists(self, path):
+        key = (ExistsCache.MISSING, path)
+        if self.exists_cache.get(key):
+            return exc.NoNode.error_code
 
+        request = protocol.ExistsRequest(path=path, watch=True)
+        request.error_codes = True
+        response = None
+        self.exists_cache.fetch_started(key)
         try:
-            await self.send(protocol.ExistsRequest(path=path, watch=watch))
-        except exc.NoNode:
-            return False
-        return True
+            response = await self.send(request)
+        finally:
+            # the watch set on an existing znode is removed with the
+            # callback of the cache
+            missing = type(response) is int and response == exc.NoNode.error_code
+            self.exists_cache.fetch_done(key, True if missing else None)
+        return response
 
     async def create(
         self,
@@ -204,6 +586,10 @@ class ZKClient:
         """
         Ensure all znodes exist in the path. Missing Znodes will be created.
 
+        The path itself is checked first. When it is missing, its ancestors
+        not known to exist are checked with pipelined requests and the
+        missing znodes are created in a single transaction.
+
         :param str path: Path of znode
 
         :param aiozk.ACL acl: ACL to be set to the new znodes
@@ -213,6 +599,9 @@ class ZKClient:
 
         acl = acl or self.default_acl
 
+        if await self.znode_exists(path):
+            return
+
         paths_to_make = []
         for segment in path[1:].split('/'):
             if not paths_to_make:
@@ -220,22 +609,68 @@ class ZKClient:
                 continue
 
             paths_to_make.append('/'.join([paths_to_make[-1], segment]))
+        all_paths = list(paths_to_make)
+
+        # skip the ancestors known to exist
+        for index in range(len(paths_to_make) - 2, -1, -1):
+            if paths_to_make[index] in self.known_paths:
+                del paths_to_make[: index + 1]
+                break
+
+        ancestors = await self._gather_many(self.znode_exists, paths_to_make[:-1], None)
+        for exists in ancestors:
+            if isinstance(exists, Exception):
+                raise exists
+            if not exists:
+                break
+            self.known_paths.set(paths_to_make.pop(0), True)
+
+        if len(paths_to_make) > 1:
+            request = protocol.TransactionRequest()
+            for path in paths_to_make:
+                request.add(self.ensure_path_request(path, acl))
+            response = await self.send(request)
+            if not any(isinstance(reply, Exception) for reply in response.responses):
+                for path in paths_to_make[:-1]:
+                    self.known_paths.set(path, True)
+                return
+        else:
+            try:
+                await self.send(self.ensure_path_request(paths_to_make[0], acl))
+                return
+            except exc.NodeExists:
+                return
+            except exc.NoNode:
+                pass
 
-        while paths_to_make:
-            path = paths_to_make[0]
-
-            if self.features.create_with_stat:
-                request = protocol.Create2Request(path=path, acl=acl)
-            else:
-                request = protocol.CreateRequest(path=path, acl=acl)
-            request.set_flags(ephemeral=False, sequential=False, container=self.features.containers)
+        # the znodes changed since they were checked, e.g. an ancestor known
+        # to exist was deleted
+        for path in all_paths:
+            self.known_paths.pop(path)
 
+        for path in all_paths:
             try:
-                await self.send(request)
+                await self.send(self.ensure_path_request(path, acl))
             except exc.NodeExists:
                 pass
 
-            paths_to_make.pop(0)
+    def ensure_path_request(self, path, acl):
+        if self.features.create_with_stat:
+            request = protocol.Create2Request(path=path, acl=acl)
+        else:
+            request = protocol.CreateRequest(path=path, acl=acl)
+        request.set_flags(ephemeral=False, sequential=False, container=self.features.containers)
+        return request
+
+    async def znode_exists(self, path):
+        request = protocol.ExistsRequest(path=path, watch=False)
+        request.error_codes = True
+        response = await self.send(request)
+        if type(response) is int:
+            if response == exc.NoNode.error_code:
+                return False
+            raise exc.get_response_error(response)
+        return True
 
     async def delete(self, path, force=False):
         """
@@ -252,25 +687,105 @@ class ZKClient:
         """
         path = self.normalize_path(path)
 
-        if not force and path in self.stat_cache:
-            version = self.stat_cache[path].version
-        else:
-            version = -1
+        version = self.cached_version(path, force)
 
         await self.send(protocol.DeleteRequest(path=path, version=version))
 
-    async def deleteall(self, path):
+    async def deleteall(self, path, concurrency=None, progress=None):
         """
         Delete all znodes in the path recursively.
 
+        The tree is read level by level with pipelined requests, then
+        deleted from the deepest level up in transactions of many znodes
+        each. A transaction that fails because of a concurrent change,
+        e.g. a znode deleted or a child created meanwhile, is retried one
+        znode at a time.
+
         :param str path: Path of znode
 
+        :param int concurrency: Maximum number of requests in flight,
+            defaults to 256
+
+        :param progress: Called with the number of znodes deleted so far
+            and the number of znodes found, after every transaction
+
+        :return: Number of znodes deleted
+        :rtype: int
+
         :raises aiozk.exc.NoNode: Raised if path does not exist.
         """
-        childs = await self.get_children(path)
-        for child in childs:
-            await self.deleteall('/'.join([path, child]))
-        await self.delete(path, force=True)
+        return await self.delete_tree(self.normalize_path(path), concurrency, progress)
+
+    async def delete_tree(self, path, concurrency, progress):
+        level = await self.children_paths(path)
+        if level is None:
+            raise exc.NoNode()
+
+        levels = [[path]]
+        while level:
+            levels.append(level)
+            level = []
+            async for _, _, children in self._pipeline(self.children_paths, levels[-1], concurrency):
+                if isinstance(children, Exception):
+                    raise children
+                # None for a znode deleted meanwhile
+                level.extend(children or ())
+        found = sum(len(level) for level in levels)
+
+        deleted = 0
+        for level in reversed(levels):
+            batches = split_paths(level, DELETE_BATCH_MAX_BYTES)
+            async for _, _, count in self._pipeline(self.delete_batch, batches, concurrency):
+                if isinstance(count, Exception):
+                    raise count
+                deleted += count
+                if progress is not None:
+                    progress(deleted, found)
+        return deleted
+
+    async def children_paths(self, path):
+        """
+        Returns the paths of the children of the znode at the normalized
+        path, None if it does not exist.
+        """
+        request = protocol.GetChildrenRequest(path=path, watch=False)
+        request.error_codes = True
+        response = await self.send(request)
+        if type(response) is int:
+            if response == exc.NoNode.error_code:
+                return None
+            raise exc.get_response_error(response)
+        prefix = path.rstrip('/')
+        return [f'{prefix}/{child}' for child in response.children]
+
+    async def delete_batch(self, paths):
+        """
+        Deletes znodes at normalized paths in a transaction, returns the
+        number of znodes deleted.
+        """
+        request = protocol.TransactionRequest()
+        for path in paths:
+            request.add(protocol.DeleteRequest(path=path, version=-1))
+        response = await self.send(request)
+        if not any(isinstance(reply, Exception) for reply in response.responses):
+            for path in paths:
+                self.stat_cache.pop(path)
+            return len(paths)
+
+        # the tree changed since it was read
+        deleted = 0
+        for path in paths:
+            request = protocol.DeleteRequest(path=path, version=-1)
+            request.error_codes = True
+            response = await self.send(request)
+            if type(response) is not int:
+                deleted += 1
+            elif response == exc.NotEmpty.error_code:
+                with suppress(exc.NoNode):
+                    deleted += await self.delete_tree(path, None, None)
+            elif response != exc.NoNode.error_code:
+                raise exc.get_response_error(response)
+        return deleted
 
     async def get(self, path, watch=False):
         """
@@ -281,17 +796,55 @@ class ZKClient:
         :param bool watch: True for setting a watch event as a side effect,
             otherwise False
 
-        :return: Data and stat of znode
+        :return: Data and stat of znode, data is a ``memoryview`` if the
+            client was created with ``zero_copy=True``, unless it comes
+            from the data cache
         :rtype: (bytes, aiozk.protocol.stat.Stat)
 
         :raises aiozk.exc.NoNode: Can be raised if path does not exist
         """
         # type: (str, bool) -> Tuple[str, protocol.stat.Stat]
         path = self.normalize_path(path)
-        response = await self.send(protocol.GetDataRequest(path=path, watch=watch))
+        request = protocol.GetDataRequest(path=path, watch=watch)
+        if self.data_cache.enabled:
+            return await self.cached_read(DataCache.DATA, request, data_result)
+
+        response = await self.send(request)
 
         return (response.data, response.stat)
 
+    async def try_get(self, path, watch=False):
+        """
+        Get data and stat of znode, reporting errors as error codes rather
+        than raising them.
+
+        Meant for reads that are expected to fail often, e.g. of optional
+        znodes, as no exception is created for a failed read.
+
+        :param str path: Path of znode
+
+        :param bool watch: True for setting a watch event as a side effect,
+            otherwise False
+
+        :return: Data, stat and error code, data and stat are None and the
+            error code is e.g. ``aiozk.exc.NoNode.error_code`` if the read
+            failed
+        :rtype: GetResult
+        """
+        path = self.normalize_path(path)
+        request = protocol.GetDataRequest(path=path, watch=watch)
+        request.error_codes = True
+        if self.data_cache.enabled:
+            result = await self.cached_read(DataCache.DATA, request, data_result)
+            if type(result) is int:
+                return GetResult(None, None, result)
+            return GetResult(*result, 0)
+
+        response = await self.send(request)
+        if type(response) is int:
+            return GetResult(None, None, response)
+        return GetResult(response.data, response.stat, 0)
+
     async def get_data(self, path, watch=False):
         """
         Get data as bytes.
@@ -354,10 +907,7 @@ class ZKClient:
         """
         path = self.normalize_path(path)
 
-        if not force and path in self.stat_cache:
-            version = self.stat_cache[path].version
-        else:
-            version = -1
+        version = self.cached_version(path, force)
 
         await self.send(protocol.SetDataRequest(path=path, data=data, version=version))
 
@@ -378,8 +928,201 @@ class ZKClient:
         """
         path = self.normalize_path(path)
 
-        response = await self.send(protocol.GetChildren2Request(path=path, watch=watch))
-        return response.children
+        request = protocol.GetChildren2Request(path=path, watch=watch)
+        if self.data_cache.enabled:
+            return list(await self.cached_read(DataCache.CHILDREN, request, children_result))
+
+        response = await self.send(request)
+        # the response may be shared by coalesced reads
+        return list(response.children)
+
+    async def iter_many(self, func, paths, concurrency=None):
+        """
+        Calls ``func`` for every path, keeping up to ``concurrency`` calls
+        in flight, and yields the results as they complete.
+
+        Only ``concurrency`` calls exist at any time, however many paths
+        are given, and the requests they send are pipelined over the
+        session.
+
+        :param func: Coroutine function called with a path, e.g. ``zk.get``
+
+        :param paths: Iterable of znode paths
+
+        :param int concurrency: Maximum number of calls in flight, defaults
+            to 256
+
+        :return: Async iterator of ``(path, result)`` tuples in completion
+            order, ``result`` is the exception raised for the path if the
+            call failed
+        """
+        async for _, path, result in self._pipeline(func, paths, concurrency):
+            yield path, result
+
+    async def _pipeline(self, func, paths, concurrency):
+        items = enumerate(paths)
+        results = asyncio.Queue()
+
+        async def worker():
+            try:
+                for index, path in items:
+                    try:
+                        result = await func(path)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        result = e
+                    results.put_nowait((index, path, result))
+            finally:
+                results.put_nowait(None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency or DEFAULT_BULK_CONCURRENCY)]
+        try:
+            running = len(workers)
+            while running:
+                item = await results.get()
+                if item is None:
+                    running -= 1
+                    continue
+                yield item
+        finally:
+            for task in workers:
+                task.cancel()
+
+    async def _gather_many(self, func, paths, concurrency):
+        paths = list(paths)
+        results = [None] * len(paths)
+        async for index, _, result in self._pipeline(func, paths, concurrency):
+            results[index] = result
+        return results
+
+    async def get_many(self, paths, watch=False, concurrency=None):
+        """
+        Get data and stat of many znodes, see `get()`.
+
+        :param paths: Iterable of znode paths
+
+        :param bool watch: True for setting a watch event on every znode
+
+        :param int concurrency: Maximum number of requests in flight,
+            defaults to 256
+
+        :return: ``(data, stat)`` for every path, in the order of the paths.
+            For paths that failed, e.g. with ``aiozk.exc.NoNode``, the
+            exception is returned in place of the result.
+        :rtype: list
+        """
+        return await self._gather_many(functools.partial(self.get, watch=watch), paths, concurrency)
+
+    async def exists_many(self, paths, watch=False, concurrency=None):
+        """
+        Check whether many znodes exist, see `exists()`.
+
+        :return: True or False for every path, in the order of the paths,
+            or the exception raised for the path
+        :rtype: list
+        """
+        return await self._gather_many(functools.partial(self.exists, watch=watch), paths, concurrency)
+
+    async def get_children_many(self, paths, watch=False, concurrency=None):
+        """
+        Get children names of many znodes, see `get_children()`.
+
+        :return: Children names for every path, in the order of the paths,
+            or the exception raised for the path
+        :rtype: list
+        """
+        return await self._gather_many(functools.partial(self.get_children, watch=watch), paths, concurrency)
+
+    async def walk(self, path, max_depth=None, concurrency=None, order='bfs'):
+        """
+        Walk the tree of znodes under the path, reading the data and the
+        children of every znode.
+
+        The znodes are read with pipelined requests ahead of the one
+        yielded next, but at most ``concurrency`` znodes are read or held
+        at any time.  Apart from them only the paths yet to be walked are
+        kept in memory: about the width of the widest level of the tree
+        in ``'bfs'`` order, the depth times the number of children in
+        ``'dfs'`` order.  Znodes deleted during the walk are skipped.
+
+        :param str path: Path of the root znode
+
+        :param int max_depth: Depth of the deepest znodes to walk, the
+            root being at depth 0, None for the whole tree
+
+        :param int concurrency: Maximum number of znodes read in advance,
+            defaults to 256
+
+        :param str order: ``'bfs'`` for walking the tree level by level,
+            ``'dfs'`` for walking every subtree before the next sibling
+
+        :return: Async iterator of ``(path, data, stat, children)`` tuples,
+            ``children`` being the names of the children
+        :raises aiozk.exc.NoNode: Raised if path does not exist
+        """
+        if order not in ('bfs', 'dfs'):
+            raise ValueError(f'Unknown walk order: {order!r}')
+        concurrency = concurrency or DEFAULT_BULK_CONCURRENCY
+
+        root = self.normalize_path(path)
+        # (normalized path, depth) of the znodes yet to be walked, taken
+        # from the left in bfs order and from the right in dfs order
+        pending = collections.deque([(root, 0)])
+        reads = {}
+
+        try:
+            while pending:
+                if len(reads) < concurrency:
+                    if order == 'bfs':
+                        # the znodes being read are the first ones
+                        ahead = itertools.islice(pending, len(reads), concurrency)
+                    else:
+                        ahead = itertools.islice(reversed(pending), concurrency)
+                    for node_path, _ in ahead:
+                        if len(reads) >= concurrency:
+                            break
+                        if node_path not in reads:
+                            reads[node_path] = asyncio.create_task(self.read_znode(node_path))
+
+                node_path, depth = pending.popleft() if order == 'bfs' else pending.pop()
+                result = await reads.pop(node_path)
+                if result is None:
+                    if node_path == root:
+                        raise exc.NoNode()
+                    continue
+                data, stat, children = result
+
+                if max_depth is None or depth < max_depth:
+                    prefix = node_path.rstrip('/')
+                    nodes = [(f'{prefix}/{child}', depth + 1) for child in children]
+                    pending.extend(nodes if order == 'bfs' else reversed(nodes))
+
+                yield self.denormalize_path(node_path) or '/', data, stat, children
+        finally:
+            for read in reads.values():
+                if read.done() and not read.cancelled():
+                    # retrieve the exception of a read that was not walked
+                    read.exception()
+                read.cancel()
+
+    async def read_znode(self, path):
+        """
+        Returns the data, stat and children names of the znode at the
+        normalized path with pipelined requests, None if it does not exist.
+        """
+        data_request = protocol.GetDataRequest(path=path, watch=False)
+        data_request.error_codes = True
+        children_request = protocol.GetChildrenRequest(path=path, watch=False)
+        children_request.error_codes = True
+        data_response, children_response = await asyncio.gather(self.send(data_request), self.send(children_request))
+        for response in (data_response, children_response):
+            if type(response) is int:
+                if response == exc.NoNode.error_code:
+                    return None
+                raise exc.get_response_error(response)
+        # the response may be shared by coalesced reads
+        return data_response.data, data_response.stat, list(children_response.children)
 
     async def get_acl(self, path):
         """
@@ -416,10 +1159,7 @@ class ZKClient:
         """
         path = self.normalize_path(path)
 
-        if not force and path in self.stat_cache:
-            version = self.stat_cache[path].version
-        else:
-            version = -1
+        version = self.cached_version(path, force)
 
         await self.send(protocol.SetACLRequest(path=path, acl=acl, version=version))
 
@@ -435,3 +1175,37 @@ class ZKClient:
         :rtype: aiozk.transaction.Transaction
         """
         return Transaction(self)
+
+    def begin_read_transaction(self):
+        """
+        Return ReadTransaction instance which collects reads to be sent in a
+        single MultiRead request. Requires Zookeeper 3.6.0 or later.
+
+        :return: ReadTransaction instance which can be used for adding
+            ``get``/``get_children`` reads
+
+        :rtype: aiozk.transaction.ReadTransaction
+        """
+        return ReadTransaction(self)
+
+    async def multi_read(self, paths, watch=False):
+        """
+        Get data and stat of many znodes in one round trip.
+
+        :param paths: Iterable of znode paths
+
+        :param bool watch: True for setting a watch event on every znode
+
+        :return: ``(data, stat)`` for every path, in the order of the paths,
+            or the exception raised for the path, e.g. ``aiozk.exc.NoNode``
+        :rtype: list
+
+        :raises ValueError: When the *multi_read* feature is not supported by
+            Zookeeper server (< 3.6.0)
+        """
+        transaction = self.begin_read_transaction()
+        for path in paths:
+            transaction.get(path, watch=watch)
+        if not transaction.request.requests:
+            return []
+        return await transaction.commit()
@@ -5,12 +5,17 @@ import re
 import struct
 import sys
 from contextlib import suppress
-from time import time
 
 from aiozk import exc, iterables, protocol
 
+from .hooks import Hooks
+from .metrics import opcode_name
+
 
 DEFAULT_READ_TIMEOUT = 3
+# requests sent within one loop iteration are written out together, up to
+# this many bytes per write
+DEFAULT_WRITE_BATCH_BYTES = 64 * 1024
 
 version_regex = re.compile(rb'Zookeeper version: (\d+)\.(\d+)\.(\d+)-.*')
 
@@ -23,15 +28,35 @@ log = logging.getLogger(__name__)
 payload_log = logging.getLogger(__name__ + '.payload')
 if payload_log.level == logging.NOTSET:
     payload_log.setLevel(logging.INFO)
-
-
-class Connection:
-    def __init__(self, host, port, watch_handler, read_timeout):
+slow_log = logging.getLogger(__name__ + '.slow')
+
+
+class Connection(asyncio.Protocol):
+    """
+    Zookeeper connection, implemented as an ``asyncio.Protocol``.
+
+    Every chunk of data received is appended to a single receive buffer and
+    all complete length-prefixed frames in it are parsed in one pass, with
+    the corresponding pending futures resolved right away.
+    """
+
+    def __init__(
+        self,
+        host,
+        port,
+        watch_handler,
+        read_timeout,
+        zero_copy=False,
+        write_batch_bytes=None,
+        max_buffered_bytes=None,
+        metrics=None,
+        hooks=None,
+        slow_request_threshold=None,
+    ):
         self.host = host
         self.port = int(port)
 
-        self.reader = None
-        self.writer = None
+        self.transport = None
         self.closing = False
 
         self.version_info = None
@@ -40,23 +65,67 @@ class Connection:
         self.watch_handler = watch_handler
 
         self.opcode_xref = {}
+        # xids of the requests whose error replies result in error codes
+        self.error_code_xids = set()
         self.host_ip = None
 
         self.pending = {}
         self.pending_specials = collections.defaultdict(list)
+        # set when the last pending reply arrives while closing
+        self.drained = None
+        # reply to the initial connect request
+        self.connect_future = None
 
         self.watches = collections.defaultdict(list)
 
         self.read_timeout = read_timeout or DEFAULT_READ_TIMEOUT
-        self.read_loop_task = None
-
-    async def _make_handshake(self):
-        self.host_ip = self.writer.transport.get_extra_info('peername')[0]
-
+        self.read_buffer = bytearray()
+        # loop time at which the currently buffered partial frame started,
+        # a single timer enforces that it is completed within read_timeout
+        self.partial_since = None
+        self.read_timer = None
+
+        # parse replies out of a memoryview of the received frame so that
+        # buffers (e.g. znode data) are handed out without being copied
+        self.zero_copy = zero_copy
+
+        self.write_batch_bytes = write_batch_bytes or DEFAULT_WRITE_BATCH_BYTES
+        self.write_buffer = []
+        self.write_buffer_size = 0
+        self.flush_handle = None
+
+        # transport write buffer high-water mark, senders wait in
+        # `wait_writable()` while it is exceeded
+        self.max_buffered_bytes = max_buffered_bytes
+        self.write_paused = None
+
+        # resolved once the connection to the server is lost
+        self.lost = None
+
+        # loop time of the last write to and of the last data received from
+        # the server, used to decide whether a heartbeat is needed
+        self.last_sent = None
+        self.last_received = None
+
+        # `aiozk.metrics.Metrics` instance, if requests are to be measured
+        self.metrics = metrics
+        # `aiozk.hooks.Hooks` instance with the request lifecycle callbacks
+        self.hooks = hooks if hooks is not None else Hooks()
+
+        # requests whose reply takes at least this many seconds are logged
+        self.slow_request_threshold = slow_request_threshold
+
+        # loop time at which each request awaiting a reply was queued, and
+        # the request itself with its size and the number of requests
+        # pending before it, kept only for requests being measured/traced
+        self.sent_at = {}
+        self.traced = {}
+
+    async def _make_handshake(self, reader, writer):
         log.debug("Sending 'srvr' command to %s:%d", self.host, self.port)
-        self.writer.write(b'srvr')
+        writer.write(b'srvr')
 
-        answer = await self.reader.read()
+        answer = await reader.read()
 
         version_line = answer.split(b'\n')[0]
         match = version_regex.match(version_line)
@@ -70,43 +139,119 @@ class Connection:
 
         log.debug('Actual connection to server %s:%d', self.host, self.port)
 
-    async def connect(self):
+    async def connect(self, version_info=None):
+        """
+        Opens the connection to the server.
+
+        Unless ``version_info`` is given, a separate connection is opened
+        first to ask the server for its version and mode with the ``srvr``
+        four letter word.  Otherwise the probe is skipped and read-only mode
+        is taken from the connect response.
+        """
+        if version_info is None:
+            await self.probe()
+        else:
+            self.version_info = tuple(version_info)
+
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(loop.create_connection(lambda: self, self.host, self.port), self.read_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f'Connection to {self.host}:{self.port} timed out after {self.read_timeout} seconds')
+
+    async def probe(self):
         log.debug('Initial connection to server %s:%d', self.host, self.port)
 
         try:
-            self.reader, self.writer = await asyncio.wait_for(
+            reader, writer = await asyncio.wait_for(
                 asyncio.open_connection(self.host, self.port), timeout=self.read_timeout
             )
         except asyncio.TimeoutError:
             raise TimeoutError(f'Connection to {self.host}:{self.port} timed out after {self.read_timeout} seconds')
 
         try:
-            await self._make_handshake()
+            await self._make_handshake(reader, writer)
         finally:
-            self.writer.close()
+            writer.close()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.host_ip = transport.get_extra_info('peername')[0]
+        if self.max_buffered_bytes:
+            transport.set_write_buffer_limits(high=self.max_buffered_bytes)
+
+    def pause_writing(self):
+        log.debug('Write buffer to %s:%s is full', self.host, self.port)
+        loop = asyncio.get_running_loop()
+        self.write_paused = loop.create_future()
 
-        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+    def resume_writing(self):
+        log.debug('Write buffer to %s:%s drained', self.host, self.port)
+        if self.write_paused and not self.write_paused.done():
+            self.write_paused.set_result(None)
+        self.write_paused = None
+
+    async def wait_writable(self):
+        """
+        Waits until the transport write buffer is below its high-water mark.
+        """
+        if self.write_paused is not None:
+            await asyncio.shield(self.write_paused)
+
+    async def wait_lost(self):
+        """
+        Waits until the connection is closed or lost.
+        """
+        if self.closing:
+            return
+        if self.lost is None:
+            loop = asyncio.get_running_loop()
+            self.lost = loop.create_future()
+        await asyncio.shield(self.lost)
+
+    def connection_lost(self, exception):
+        log.debug('Connection to %s:%s lost: %s', self.host, self.port, exception)
+        self.closing = True
+        if self.lost and not self.lost.done():
+            self.lost.set_result(None)
+        if self.read_timer:
+            self.read_timer.cancel()
+            self.read_timer = None
+        if self.flush_handle:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        self.write_buffer = []
+        self.write_buffer_size = 0
+        self.resume_writing()
+        if self.connect_future and not self.connect_future.done():
+            self.connect_future.set_exception(ConnectionAbortedError())
+        if self.pending_count() > 0:
+            self.abort()
+        self.set_drained()
 
     async def send_connect(self, request):
-        # meant to be used before the read_loop starts
+        # meant to be used before any other request is sent
         payload_log.debug('[SEND] (initial) %s', request)
 
         payload = request.serialize()
         payload = size_struct.pack(len(payload)) + payload
 
-        self.writer.write(payload)
+        loop = asyncio.get_running_loop()
+        self.connect_future = loop.create_future()
+
+        self.transport.write(payload)
+        self.last_sent = loop.time()
 
         try:
-            _, zxid, response = await self.read_response(initial_connect=True)
+            response = await self.connect_future
         except Exception:
             log.exception('Error reading connect response.')
             return
+        finally:
+            self.connect_future = None
 
         payload_log.debug('[RECV] (initial) %s', response)
-        return zxid, response
-
-    def start_read_loop(self):
-        self.read_loop_task = asyncio.create_task(self.read_loop())
+        return None, response
 
     def send(self, request, xid=None):
         loop = asyncio.get_running_loop()
@@ -122,109 +267,272 @@ class Connection:
         payload_log.debug('[SEND] (xid: %s) %s', xid, request)
 
         payload = request.serialize(xid)
-        payload = size_struct.pack(len(payload)) + payload
 
         self.opcode_xref[xid] = request.opcode
+        if request.error_codes:
+            self.error_code_xids.add(xid)
+
+        size = size_struct.size + len(payload)
+        tracing = self.hooks.on_response or self.slow_request_threshold is not None
+        if self.metrics is not None or tracing:
+            self.sent_at[xid] = loop.time()
+            if self.metrics is not None:
+                self.metrics.request_sent(request.opcode, size)
+            if tracing:
+                self.traced[xid] = (request, size, self.pending_count())
+        if self.hooks.on_enqueue:
+            self.hooks.fire(
+                'on_enqueue',
+                request=request,
+                xid=xid,
+                opcode=request.opcode,
+                path=getattr(request, 'path', None),
+                size=size,
+                pending=self.pending_count(),
+            )
 
         if xid in protocol.SPECIAL_XIDS:
             self.pending_specials[xid].append(f)
         else:
             self.pending[xid] = f
 
+        self.write_buffer.append(size_struct.pack(len(payload)))
+        self.write_buffer.append(payload)
+        self.write_buffer_size += size
+
+        if self.write_buffer_size >= self.write_batch_bytes:
+            self.flush()
+        elif self.flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self.flush_handle = loop.call_soon(self.flush)
+
+        return f
+
+    def flush(self):
+        """
+        Writes out all requests buffered by `send()` with a single call.
+        """
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+        if not self.write_buffer:
+            return
+
+        chunks = self.write_buffer
+        size = self.write_buffer_size
+        self.write_buffer = []
+        self.write_buffer_size = 0
+
         try:
-            self.writer.write(payload)
+            self.transport.writelines(chunks)
+            self.last_sent = asyncio.get_running_loop().time()
         except Exception:
             log.exception('Exception during write')
             self.abort()
+            return
 
-        return f
+        if self.hooks.on_write:
+            # every request is made of a size prefix and a payload chunk
+            self.hooks.fire('on_write', host=self.host, port=self.port, size=size, count=len(chunks) // 2)
 
     def pending_count(self):
         return sum(len(futs) for futs in self.pending_specials.values()) + len(self.pending)
 
-    async def read_loop(self):
+    def pause_reading(self):
         """
-        Infinite loop that reads messages off of the socket while not closed.
+        Stops receiving data, replies stay in the socket buffer until
+        `resume_reading()` is called.
+        """
+        self.transport.pause_reading()
 
-        When a message is received its corresponding pending Future is set
-        to have the message as its result.
+    def resume_reading(self):
+        self.transport.resume_reading()
 
-        This is never used directly and is fired as a separate callback on the
-        I/O loop via the `connect()` method.
+    def data_received(self, data):
         """
-        while not self.closing or self.pending_count() > 0:
-            try:
-                xid, zxid, response = await self.read_response()
-            except (ConnectionAbortedError, asyncio.CancelledError):
-                return
-            except Exception:
-                log.exception('Error reading response.')
-                self.abort()
-                return
-
-            payload_log.debug('[RECV] (xid: %s) %s', xid, response)
+        Parses every complete frame available in the received data.
 
-            if xid == protocol.WATCH_XID:
-                self.watch_handler(response)
-                continue
-            elif xid in protocol.SPECIAL_XIDS:
-                f = self.pending_specials[xid].pop()
-            else:
-                f = self.pending.pop(xid)
+        Frames are sliced straight out of ``data`` when nothing is buffered,
+        otherwise out of the receive buffer, so each frame is copied once.
+        Whatever is left over is the beginning of a frame that has not been
+        fully received yet, it has to be completed within ``read_timeout``.
+        """
+        loop = asyncio.get_running_loop()
+        self.last_received = loop.time()
+        if self.metrics is not None:
+            self.metrics.bytes_received += len(data)
 
-            if not f.done():
-                if isinstance(response, Exception):
-                    f.set_exception(response)
-                else:
-                    f.set_result((zxid, response))
-
-    async def _read(self, size=-1):
-        remaining_size = size
-        end_time = time() + self.read_timeout
-        payload = []
-        while remaining_size and (time() < end_time):
-            remaining_time = end_time - time()
-            try:
-                chunk = await asyncio.wait_for(self.reader.read(remaining_size), timeout=remaining_time)
-            except asyncio.TimeoutError:
-                continue
-            payload.append(chunk)
-            remaining_size -= len(chunk)
-        if remaining_size:
-            raise exc.UnfinishedRead
-        return b''.join(payload)
+        if self.read_buffer:
+            self.read_buffer += data
+            buff = self.read_buffer
+        else:
+            buff = data
 
-    async def read_response(self, initial_connect=False):
+        offset = 0
+        buff_size = len(buff)
+        view = memoryview(buff)
         try:
-            raw_size = await self.reader.readexactly(size_struct.size)
-        except asyncio.IncompleteReadError:
-            raise ConnectionAbortedError
-        size = size_struct.unpack(raw_size)[0]
+            while buff_size - offset >= size_struct.size:
+                size = size_struct.unpack_from(buff, offset)[0]
+                end = offset + size_struct.size + size
+                if end > buff_size:
+                    break
+                frame = bytes(view[offset + size_struct.size : end])
+                offset = end
+
+                self.frame_received(frame)
+        except Exception:
+            log.exception('Error reading response.')
+            self.abort()
+            self.transport.close()
+            return
+        finally:
+            view.release()
+            if buff is self.read_buffer:
+                del buff[:offset]
+            elif offset < buff_size:
+                self.read_buffer += buff[offset:]
+
+        if not self.read_buffer:
+            self.partial_since = None
+        elif self.partial_since is None or offset:
+            # a new frame has started, it must be completed within read_timeout
+            self.partial_since = loop.time()
+            if self.read_timer is None:
+                self.read_timer = loop.call_later(self.read_timeout, self.check_partial_read)
+
+    def check_partial_read(self):
+        self.read_timer = None
+        if self.partial_since is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        remaining = self.partial_since + self.read_timeout - loop.time()
+        if remaining > 0:
+            self.read_timer = loop.call_later(remaining, self.check_partial_read)
+            return
+
+        log.error('Unfinished read from %s:%s after %s seconds', self.host, self.port, self.read_timeout)
+        self.abort(exception=exc.UnfinishedRead)
+        self.transport.close()
 
+    def frame_received(self, frame):
         # connect and close op replies don't contain a reply header
-        if initial_connect or self.pending_specials[protocol.CLOSE_XID]:
-            raw_payload = await self._read(size)
-            response = protocol.ConnectResponse.deserialize(raw_payload)
-            return (None, None, response)
+        if self.connect_future is not None and not self.connect_future.done():
+            self.connect_future.set_result(protocol.ConnectResponse.deserialize(frame))
+            return
+        if self.pending_specials.get(protocol.CLOSE_XID):
+            response = protocol.ConnectResponse.deserialize(frame)
+            if self.sent_at:
+                self.record_reply(protocol.CLOSE_XID, protocol.CloseRequest.opcode, response, len(frame))
+            f = self.pending_specials[protocol.CLOSE_XID].pop()
+            if not f.done():
+                f.set_result((None, response))
+            if self.closing and not self.pending_count():
+                self.set_drained()
+            return
 
-        raw_header = await self._read(reply_header_struct.size)
-        xid, zxid, error_code = reply_header_struct.unpack_from(raw_header)
+        xid, zxid, error_code = reply_header_struct.unpack_from(frame)
 
         if error_code:
-            self.opcode_xref.pop(xid)
-            return (xid, zxid, exc.get_response_error(error_code))
+            opcode = self.opcode_xref.pop(xid)
+            if xid in self.error_code_xids:
+                self.error_code_xids.discard(xid)
+                response = error_code
+            else:
+                response = exc.get_response_error(error_code)
+        else:
+            if self.zero_copy:
+                frame = memoryview(frame)
 
-        size -= reply_header_struct.size
+            if xid == protocol.WATCH_XID:
+                response = protocol.WatchEvent.deserialize(frame, reply_header_struct.size)
+            else:
+                opcode = self.opcode_xref.pop(xid)
+                response = protocol.response_xref[opcode].deserialize(frame, reply_header_struct.size)
+                if self.error_code_xids:
+                    self.error_code_xids.discard(xid)
 
-        raw_payload = await self._read(size)
+        payload_log.debug('[RECV] (xid: %s) %s', xid, response)
 
         if xid == protocol.WATCH_XID:
-            response = protocol.WatchEvent.deserialize(raw_payload)
+            self.watch_handler(response)
+            return
+
+        if self.sent_at:
+            self.record_reply(xid, opcode, response, len(frame))
+
+        if xid in protocol.SPECIAL_XIDS:
+            f = self.pending_specials[xid].pop()
         else:
-            opcode = self.opcode_xref.pop(xid)
-            response = protocol.response_xref[opcode].deserialize(raw_payload)
+            f = self.pending.pop(xid)
+
+        if not f.done():
+            if isinstance(response, Exception):
+                f.set_exception(response)
+            else:
+                f.set_result((zxid, response))
 
-        return (xid, zxid, response)
+        if self.closing and not self.pending_count():
+            self.set_drained()
+
+    def record_reply(self, xid, opcode, response, size):
+        sent_at = self.sent_at.pop(xid, None)
+        if sent_at is None:
+            return
+        loop = asyncio.get_running_loop()
+        latency = loop.time() - sent_at
+        if type(response) is int:
+            error_class = exc.response_error_xref.get(response, exc.UnknownError)
+        else:
+            error_class = type(response) if isinstance(response, Exception) else None
+
+        if self.metrics is not None:
+            self.metrics.request_done(opcode, latency, error_class)
+
+        traced = self.traced.pop(xid, None)
+        if traced is None:
+            return
+        request, request_size, pending = traced
+        path = getattr(request, 'path', None)
+
+        if self.slow_request_threshold is not None and latency >= self.slow_request_threshold:
+            slow_log.warning(
+                'Slow %s request for %s: %.3f seconds, %d bytes sent, %d bytes received, '
+                '%d requests pending at send, server %s:%s (%s)',
+                opcode_name(opcode),
+                path,
+                latency,
+                request_size,
+                size,
+                pending,
+                self.host,
+                self.port,
+                self.host_ip,
+            )
+            if self.metrics is not None:
+                self.metrics.slow_requests[opcode] += 1
+
+        if self.hooks.on_response:
+            if type(response) is int:
+                error = exc.get_response_error(response)
+            else:
+                error = response if error_class else None
+            self.hooks.fire(
+                'on_response',
+                request=request,
+                xid=xid,
+                opcode=opcode,
+                path=path,
+                size=size,
+                latency=latency,
+                error=error,
+            )
+
+    def set_drained(self):
+        if self.drained and not self.drained.done():
+            self.drained.set_result(None)
 
     def abort(self, exception=exc.ConnectError):
         """
@@ -250,6 +558,25 @@ class Connection:
             if pending.done() or pending.cancelled():
                 continue
             abort_pending(pending)
+        self.error_code_xids.clear()
+
+        for xid, _ in iterables.drain(self.sent_at):
+            opcode = self.opcode_xref.get(xid)
+            if self.metrics is not None:
+                self.metrics.request_done(opcode, error=exception)
+            traced = self.traced.pop(xid, None)
+            if traced is not None and self.hooks.on_response:
+                request = traced[0]
+                self.hooks.fire(
+                    'on_response',
+                    request=request,
+                    xid=xid,
+                    opcode=opcode,
+                    path=getattr(request, 'path', None),
+                    size=None,
+                    latency=None,
+                    error=exception(self.host, self.port),
+                )
 
     def drain_all_pending(self):
         for special_xid in protocol.SPECIAL_XIDS:
@@ -263,26 +590,23 @@ class Connection:
             return
         self.closing = True
 
-        if self.read_loop_task and not self.read_loop_task.done():
-            try:
-                await asyncio.wait_for(self.read_loop_task, timeout)
-            except asyncio.TimeoutError:
-                # At this point, read_loop_task.cancel() was already called by
-                # wait_for.
-                with suppress(asyncio.CancelledError):
-                    await self.read_loop_task
+        self.flush()
+
+        if self.pending_count() > 0:
+            loop = asyncio.get_running_loop()
+            self.drained = loop.create_future()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.drained, timeout)
 
         try:
             if self.pending_count() > 0:
                 log.warning('Pendings: %s; specials: %s', self.pending, self.pending_specials)
                 self.abort(exception=exc.TimeoutError)
-        except asyncio.TimeoutError:
-            log.warning('ABORT Timeout')
-            await self.abort(exception=exc.TimeoutError)
         except Exception as e:
             log.exception('in close: %s', e)
             raise e
         finally:
-            log.debug('Closing writer')
-            self.writer.close()
-            log.debug('Writer closed')
+            log.debug('Closing transport')
+            if self.transport:
+                self.transport.close()
+            log.debug('Transport closed')
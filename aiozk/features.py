@@ -2,6 +2,9 @@ ALL_FEATURES = {
     'create_with_stat': (3, 5, 0),
     'containers': (3, 5, 1),
     'reconfigure': (3, 5, 0),
+    'remove_watches': (3, 5, 0),
+    'multi_read': (3, 6, 0),
+    'persistent_watches': (3, 6, 0),
 }
 
 
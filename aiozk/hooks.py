@@ -0,0 +1,53 @@
+import logging
+
+
+log = logging.getLogger(__name__)
+
+
+HOOK_NAMES = ('on_enqueue', 'on_write', 'on_response', 'on_retry', 'on_state_change')
+
+
+class Hooks:
+    """
+    Callbacks invoked along the lifecycle of every request.
+
+    Callbacks are called synchronously with keyword arguments, exceptions
+    raised by them are logged and otherwise ignored.  Nothing is computed
+    for a hook that has no callbacks.
+
+    - **on_enqueue** ``(request, xid, opcode, path, size, pending)`` A
+      request of ``size`` bytes was queued for writing while ``pending``
+      other requests were awaiting their replies.
+    - **on_write** ``(host, port, size, count)`` ``count`` queued requests
+      were written to the server with a single call.
+    - **on_response** ``(request, xid, opcode, path, size, latency, error)``
+      A reply of ``size`` bytes arrived ``latency`` seconds after the
+      request was queued, ``error`` is the exception it failed with, if
+      any.  When the connection is lost before the reply arrives, ``size``
+      and ``latency`` are None.
+    - **on_retry** ``(request, opcode, path, error)`` The request is sent
+      again after it failed with a connection error.
+    - **on_state_change** ``(old, new)`` The session state changed.
+    """
+
+    def __init__(self):
+        for name in HOOK_NAMES:
+            setattr(self, name, [])
+
+    def add(self, name, callback):
+        """
+        Registers a callback for the hook called ``name``.
+        """
+        if name not in HOOK_NAMES:
+            raise ValueError(f'Unknown hook: {name}')
+        getattr(self, name).append(callback)
+
+    def remove(self, name, callback):
+        getattr(self, name).remove(callback)
+
+    def fire(self, name, **kwargs):
+        for callback in getattr(self, name):
+            try:
+                callback(**kwargs)
+            except Exception:
+                log.exception('Error in %s hook %r', name, callback)
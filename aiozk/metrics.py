@@ -0,0 +1,229 @@
+import bisect
+import collections
+import math
+
+from aiozk import protocol
+
+
+# upper bounds of the request latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def opcode_name(opcode):
+    """
+    Returns a readable name of an opcode, e.g. ``GetData`` for 4.
+    """
+    response_class = protocol.response_xref.get(opcode)
+    if response_class is None:
+        return str(opcode)
+    name = response_class.__name__
+    if name.endswith('Response'):
+        name = name[: -len('Response')]
+    return name
+
+
+class Histogram:
+    """
+    Counts observed values into fixed buckets.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        # the last count is for values above the highest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        """
+        Returns a dict with cumulative ``(upper bound, count)`` buckets, the
+        number and the sum of all observed values.
+        """
+        buckets = []
+        total = 0
+        for bound, count in zip((*self.buckets, math.inf), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return {'buckets': buckets, 'count': self.count, 'sum': self.sum}
+
+
+class Metrics:
+    """
+    Request metrics of a session, shared by all of its connections.
+
+    Contains attributes:
+
+    - **requests** Number of requests sent, per opcode.
+    - **errors** Number of failed requests, per opcode and exception class.
+    - **latency** Histogram of the time from sending a request to receiving
+      its reply, per opcode.
+    - **in_flight** Number of requests awaiting a reply, per opcode.
+    - **slow_requests** Number of replies that took longer than the slow
+      request threshold, per opcode.
+    - **coalesced** Number of reads that shared the response of an
+      identical read in flight instead of being sent, per opcode.
+    - **bytes_sent**, **bytes_received** Bytes written to and read from
+      the servers.
+    - **connections** Number of times a session was established.
+    - **watch_restore_requests** Number of ``SetWatches`` requests sent to
+      restore watches on a new connection.
+    - **watch_restore_pending** Number of those requests awaiting a reply.
+    - **watches_restored** Number of watches restored.
+    """
+
+    def __init__(self):
+        self.requests = collections.Counter()
+        self.errors = collections.Counter()
+        self.latency = collections.defaultdict(Histogram)
+        self.in_flight = collections.Counter()
+        self.slow_requests = collections.Counter()
+        self.coalesced = collections.Counter()
+
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+        self.connections = 0
+
+        self.watch_restore_requests = 0
+        self.watch_restore_pending = 0
+        self.watches_restored = 0
+
+    def request_sent(self, opcode, size):
+        self.requests[opcode] += 1
+        self.in_flight[opcode] += 1
+        self.bytes_sent += size
+
+    def request_done(self, opcode, latency=None, error=None):
+        """
+        Records the reply to a request, or its failure.
+
+        ``latency`` is None for requests that never got a reply.
+        """
+        self.in_flight[opcode] -= 1
+        if error is not None:
+            self.errors[opcode, error.__name__] += 1
+        if latency is not None:
+            self.latency[opcode].observe(latency)
+
+    def snapshot(self):
+        """
+        Returns a dict with the current values, keyed by opcode name.
+        """
+        errors = collections.defaultdict(dict)
+        for (opcode, error), count in self.errors.items():
+            errors[opcode_name(opcode)][error] = count
+
+        return {
+            'requests': {opcode_name(opcode): count for opcode, count in self.requests.items()},
+            'errors': dict(errors),
+            'latency': {opcode_name(opcode): histogram.snapshot() for opcode, histogram in self.latency.items()},
+            'in_flight': {opcode_name(opcode): count for opcode, count in self.in_flight.items()},
+            'slow_requests': {opcode_name(opcode): count for opcode, count in self.slow_requests.items()},
+            'coalesced': {opcode_name(opcode): count for opcode, count in self.coalesced.items()},
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'connections': self.connections,
+            'reconnects': max(self.connections - 1, 0),
+            'watch_restore_requests': self.watch_restore_requests,
+            'watch_restore_pending': self.watch_restore_pending,
+            'watches_restored': self.watches_restored,
+        }
+
+
+# names of the caches in the Prometheus output and their snapshot keys
+CACHES = (('stat', 'stat_cache'), ('data', 'data_cache'), ('exists', 'exists_cache'))
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(value)
+
+
+def to_prometheus(snapshot, namespace='aiozk'):
+    """
+    Renders a snapshot as returned by `aiozk.ZKClient.stats()` in the
+    Prometheus text exposition format.
+    """
+    lines = []
+
+    def metric(name, kind, samples):
+        name = f'{namespace}_{name}'
+        lines.append(f'# TYPE {name} {kind}')
+        for suffix, labels, value in samples:
+            label_text = ','.join(f'{key}="{label}"' for key, label in labels)
+            if label_text:
+                label_text = '{' + label_text + '}'
+            lines.append(f'{name}{suffix}{label_text} {format_value(value)}')
+
+    if 'requests' in snapshot:
+        metric('requests_total', 'counter', [('', [('op', op)], count) for op, count in snapshot['requests'].items()])
+        metric(
+            'errors_total',
+            'counter',
+            [
+                ('', [('op', op), ('error', error)], count)
+                for op, errors in snapshot['errors'].items()
+                for error, count in errors.items()
+            ],
+        )
+
+        samples = []
+        for op, histogram in snapshot['latency'].items():
+            for bound, count in histogram['buckets']:
+                samples.append(('_bucket', [('op', op), ('le', format_value(bound))], count))
+            samples.append(('_sum', [('op', op)], histogram['sum']))
+            samples.append(('_count', [('op', op)], histogram['count']))
+        metric('request_latency_seconds', 'histogram', samples)
+
+        metric('in_flight', 'gauge', [('', [('op', op)], count) for op, count in snapshot['in_flight'].items()])
+        metric(
+            'slow_requests_total',
+            'counter',
+            [('', [('op', op)], count) for op, count in snapshot['slow_requests'].items()],
+        )
+        metric(
+            'coalesced_requests_total',
+            'counter',
+            [('', [('op', op)], count) for op, count in snapshot['coalesced'].items()],
+        )
+        metric('sent_bytes_total', 'counter', [('', [], snapshot['bytes_sent'])])
+        metric('received_bytes_total', 'counter', [('', [], snapshot['bytes_received'])])
+        metric('connections_total', 'counter', [('', [], snapshot['connections'])])
+        metric('reconnects_total', 'counter', [('', [], snapshot['reconnects'])])
+        metric('watch_restore_requests_total', 'counter', [('', [], snapshot['watch_restore_requests'])])
+        metric('watch_restore_pending', 'gauge', [('', [], snapshot['watch_restore_pending'])])
+        metric('watches_restored_total', 'counter', [('', [], snapshot['watches_restored'])])
+
+    window = snapshot.get('window')
+    if window:
+        metric('window_in_flight', 'gauge', [('', [], window['in_flight'])])
+        metric('window_queue_depth', 'gauge', [('', [], window['queue_depth'])])
+        metric('window_max_queue_depth', 'gauge', [('', [], window['max_queue_depth'])])
+        metric('window_queued_total', 'counter', [('', [], window['queued_total'])])
+
+    watches = snapshot.get('watches')
+    if watches:
+        metric('watches', 'gauge', [('', [], watches['watches'])])
+        metric('watch_callbacks', 'gauge', [('', [], watches['callbacks'])])
+        metric('persistent_watches', 'gauge', [('', [], watches['persistent_watches'])])
+        metric('persistent_watch_callbacks', 'gauge', [('', [], watches['persistent_callbacks'])])
+        metric('server_watches', 'gauge', [('', [], watches['server_watches'])])
+
+    caches = [(name, snapshot[key]) for name, key in CACHES if snapshot.get(key)]
+    if caches:
+        metric('cache_entries', 'gauge', [('', [('cache', name)], cache['size']) for name, cache in caches])
+        metric('cache_bytes', 'gauge', [('', [('cache', name)], cache['bytes']) for name, cache in caches])
+        for counter in ('hits', 'misses', 'evictions'):
+            metric(
+                f'cache_{counter}_total',
+                'counter',
+                [('', [('cache', name)], cache[counter]) for name, cache in caches],
+            )
+
+    return '\n'.join(lines) + '\n'
@@ -72,6 +72,10 @@ from .watches import (  # noqa
     WatchEvent,
     SetWatchesRequest,
     SetWatchesResponse,
+    SetWatches2Request,
+    SetWatches2Response,
+    AddWatchRequest,
+    AddWatchResponse,
     CheckWatchesRequest,
     CheckWatchesResponse,
     RemoveWatchesRequest,
@@ -84,6 +88,8 @@ from .response import (  # noqa
 from .transaction import (  # noqa
     TransactionRequest,
     TransactionResponse,
+    MultiReadRequest,
+    MultiReadResponse,
 )
 
 SPECIAL_XIDS = (AUTH_XID, PING_XID, CLOSE_XID)
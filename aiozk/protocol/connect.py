@@ -25,3 +25,17 @@ class ConnectResponse(Response):
         ('session_id', Long),
         ('password', Buffer),
     )
+
+    @classmethod
+    def deserialize(cls, raw_bytes, offset=0):
+        """
+        Parses the optional trailing ``read_only`` flag as well, it is None
+        when the server does not send it.
+        """
+        instance, offset = cls.parse(raw_bytes, offset)
+
+        instance.read_only = None
+        if len(raw_bytes) > offset:
+            instance.read_only, _ = Bool.parse(raw_bytes, offset)
+
+        return instance
@@ -1,9 +1,61 @@
 import operator
+import struct
 
 from .primitives import Primitive
 
 
-class Part:
+def compile_parts(parts):
+    """
+    Compiles a ``parts`` definition into a tuple of codec steps.
+
+    Consecutive fixed-width primitives are fused into a single step backed by
+    one ``struct.Struct``, so e.g. a `Stat` is decoded with one
+    ``unpack_from()`` call.  Every other sub-part becomes a step of its own.
+
+    Each step is a ``(fixed, name, codec)`` tuple where ``name`` is a tuple of
+    names and ``codec`` a ``struct.Struct`` for fixed steps, or a single name
+    and the part class otherwise.
+    """
+    steps = []
+    run_names = []
+    run_formats = []
+
+    def flush_run():
+        if run_names:
+            steps.append((True, tuple(run_names), struct.Struct('!' + ''.join(run_formats))))
+            del run_names[:]
+            del run_formats[:]
+
+    for name, part_class in parts:
+        if issubclass(part_class, Primitive) and part_class.fmt:
+            run_names.append(name)
+            run_formats.append(part_class.fmt)
+            continue
+
+        flush_run()
+        steps.append((False, name, part_class))
+
+    flush_run()
+
+    return tuple(steps)
+
+
+class PartMeta(type):
+    """
+    Metaclass that compiles the ``parts`` of every `Part` subclass once, at
+    class creation time.
+    """
+
+    def __new__(cls, name, bases, attrs):
+        new_class = super(PartMeta, cls).__new__(cls, name, bases, attrs)
+
+        new_class.part_names = frozenset(item[0] for item in new_class.parts)
+        new_class.compiled_parts = compile_parts(new_class.parts)
+
+        return new_class
+
+
+class Part(metaclass=PartMeta):
     """
     Composable building block used to define Zookeeper protocol parts.
 
@@ -15,7 +67,7 @@ class Part:
     parts = ()
 
     def __init__(self, **kwargs):
-        part_names = set([item[0] for item in self.parts])
+        part_names = set(self.part_names)
 
         for name, value in kwargs.items():
             if name not in part_names:
@@ -56,23 +108,50 @@ class Part:
 
         return ''.join(fmt), data
 
+    def encode(self):
+        """
+        Returns the bytes representation of the instance.
+
+        Uses the compiled codec steps, packing each run of fixed-width
+        sub-parts with a single precompiled ``struct.Struct``.
+        """
+        chunks = []
+
+        for fixed, name, codec in self.compiled_parts:
+            if fixed:
+                chunks.append(codec.pack(*[getattr(self, item, None) for item in name]))
+            elif issubclass(codec, Primitive):
+                chunks.append(codec.encode(getattr(self, name, None)))
+            else:
+                chunks.append(getattr(self, name).encode())
+
+        return b''.join(chunks)
+
     @classmethod
     def parse(cls, buff, offset):
         """
         Given a buffer and offset, returns the parsed value and new offset.
 
-        Calls `parse()` on the given buffer for each sub-part in order and
+        Runs the compiled codec steps over the given buffer in order and
         creates a new instance with the results.
         """
         values = {}
 
-        for name, part in cls.parts:
-            value, new_offset = part.parse(buff, offset)
+        for fixed, name, codec in cls.compiled_parts:
+            if fixed:
+                values.update(zip(name, codec.unpack_from(buff, offset)))
+                offset += codec.size
+            else:
+                values[name], offset = codec.parse(buff, offset)
+
+        if cls.__init__ is not Part.__init__:
+            return cls(**values), offset
 
-            values[name] = value
-            offset = new_offset
+        # all part names are known to be present, skip the checks in __init__
+        instance = cls.__new__(cls)
+        instance.__dict__.update(values)
 
-        return cls(**values), offset
+        return instance, offset
 
     def __eq__(self, other):
         """
@@ -1,5 +1,7 @@
 import struct
 
+from aiozk import exc
+
 
 class Primitive:
     """
@@ -12,6 +14,12 @@ class Primitive:
     """
 
     fmt = None
+    struct = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # compiled once per primitive class instead of on every parse() call
+        cls.struct = struct.Struct('!' + cls.fmt) if cls.fmt else None
 
     def __init__(self, value):
         self.value = value
@@ -25,18 +33,23 @@ class Primitive:
         """
         return self.fmt, [self.value]
 
+    @classmethod
+    def encode(cls, value):
+        """
+        Returns the bytes representation of the given value.
+        """
+        return cls.struct.pack(value)
+
     @classmethod
     def parse(cls, buff, offset):
         """
         Given a buffer and offset, returns the parsed value and new offset.
 
-        Uses the ``format`` class attribute to unpack the data from the buffer
-        and determine the used up number of bytes.
+        Uses the precompiled ``struct`` class attribute to unpack the data from
+        the buffer and determine the used up number of bytes.
         """
-        primitive_struct = struct.Struct('!' + cls.fmt)
-
-        value = primitive_struct.unpack_from(buff, offset)[0]
-        offset += primitive_struct.size
+        value = cls.struct.unpack_from(buff, offset)[0]
+        offset += cls.struct.size
 
         return value, offset
 
@@ -57,7 +70,8 @@ class VariablePrimitive(Primitive):
 
     size_primitive = None
 
-    def render_value(self, value):
+    @classmethod
+    def render_value(cls, value):
         raise NotImplementedError
 
     @classmethod
@@ -89,6 +103,18 @@ class VariablePrimitive(Primitive):
 
         return fmt, [size, value]
 
+    @classmethod
+    def encode(cls, value):
+        """
+        Returns the size-prefixed bytes representation of the given value.
+        """
+        if value is None:
+            return cls.size_primitive.encode(-1)
+
+        value = cls.render_value(value)
+
+        return cls.size_primitive.encode(len(value)) + value
+
     @classmethod
     def parse(cls, buff, offset):
         """
@@ -101,13 +127,15 @@ class VariablePrimitive(Primitive):
         if size == -1:
             return None, offset
 
-        var_struct = struct.Struct('!%ds' % size)
+        end = offset + size
+        if end > len(buff):
+            raise exc.UnfinishedRead(
+                '%s of %d bytes at offset %d exceeds buffer of %d bytes' % (cls.__name__, size, offset, len(buff))
+            )
 
-        value = var_struct.unpack_from(buff, offset)[0]
-        value = cls.parse_value(value)
-        offset += var_struct.size
+        value = cls.parse_value(buff[offset:end])
 
-        return value, offset
+        return value, end
 
 
 class Bool(Primitive):
@@ -167,12 +195,14 @@ class UString(VariablePrimitive):
 
     size_primitive = Int
 
-    def render_value(self, value):
+    @classmethod
+    def render_value(cls, value):
         return bytes(str(value).encode('utf-8'))
 
     @classmethod
     def parse_value(cls, value):
-        return value.decode('utf-8')
+        # works for both bytes and memoryview slices
+        return str(value, 'utf-8')
 
     def __str__(self):
         return str(self.value)
@@ -185,7 +215,8 @@ class Buffer(VariablePrimitive):
 
     size_primitive = Int
 
-    def render_value(self, value):
+    @classmethod
+    def render_value(cls, value):
         if isinstance(value, str):
             return value.encode()
         # return bytes(value)
@@ -243,6 +274,23 @@ class Vector(Primitive):
 
         return ''.join(fmt), data
 
+    @classmethod
+    def encode(cls, value):
+        """
+        Returns the count-prefixed bytes representation of the array value.
+        """
+        if value is None:
+            value = []
+
+        if issubclass(cls.item_class, Primitive):
+            encode_item = cls.item_class.encode
+        else:
+
+            def encode_item(item):
+                return item.encode()
+
+        return Int.encode(len(value)) + b''.join([encode_item(item) for item in value])
+
     @classmethod
     def parse(cls, buff, offset):
         """
@@ -1,6 +1,5 @@
 import logging
 import struct
-from io import BytesIO
 
 from .part import Part
 from .primitives import Int
@@ -8,37 +7,36 @@ from .primitives import Int
 
 log = logging.getLogger(__name__)
 
+# request preamble: optional xid followed by optional opcode
+xid_opcode_struct = struct.Struct('!' + Int.fmt + Int.fmt)
+
 
 class Request(Part):
     """
     Returns a bytesring representation of the request instance.
 
-    # TODO(wglass): specify how xid and type preamble goes in
+    The payload is prefixed with the xid and opcode (when given), the rest
+    is a matter of appending the result of an ``encode()`` call since this
+    is a ``Part`` subclass.
 
-    Since this is a ``Part`` subclass the rest is a matter of
-    appending the result of a ``render()`` call.
+    When ``error_codes`` is set on a request, an error reply results in its
+    error code rather than in raising an exception, which is cheaper for
+    errors that are expected, e.g. ``NoNode`` when probing a path.
     """
 
     opcode = None
     special_xid = None
     writes_data = False
+    error_codes = False
 
-    def serialize(self, xid=None):
-        buff = BytesIO()
-
-        formats = []
-        data = []
+    def serialize_preamble(self, xid=None):
+        if xid is not None and self.opcode:
+            return xid_opcode_struct.pack(xid, self.opcode)
         if xid is not None:
-            formats.append(Int.fmt)
-            data.append(xid)
+            return Int.encode(xid)
         if self.opcode:
-            formats.append(Int.fmt)
-            data.append(self.opcode)
+            return Int.encode(self.opcode)
+        return b''
 
-        payload_format, payload_data = self.render()
-        formats.append(payload_format)
-        data.extend(payload_data)
-
-        buff.write(struct.pack('!' + ''.join(formats), *data))
-
-        return buff.getvalue()
+    def serialize(self, xid=None):
+        return self.serialize_preamble(xid) + self.encode()
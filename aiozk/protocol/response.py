@@ -1,10 +1,10 @@
-from .part import Part
+from .part import Part, PartMeta
 
 
 response_xref = {}
 
 
-class ResponseMeta(type):
+class ResponseMeta(PartMeta):
     def __new__(cls, name, bases, attrs):
         new_class = super(ResponseMeta, cls).__new__(cls, name, bases, attrs)
 
@@ -24,14 +24,17 @@ class Response(Part, metaclass=ResponseMeta):
     opcode = None
 
     @classmethod
-    def deserialize(cls, raw_bytes):
+    def deserialize(cls, raw_bytes, offset=0):
         """
         Deserializes the given raw bytes into an instance.
 
         Since this is a subclass of ``Part`` but a top-level one (i.e. no other
         subclass of ``Part`` would have a ``Response`` as a part) this merely
         has to parse the raw bytes and discard the resulting offset.
+
+        The raw bytes may be a ``memoryview``, in which case ``Buffer`` values
+        are parsed as views into it rather than copies.
         """
-        instance, _ = cls.parse(raw_bytes, offset=0)
+        instance, _ = cls.parse(raw_bytes, offset)
 
         return instance
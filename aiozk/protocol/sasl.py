@@ -8,7 +8,7 @@ class SASLRequest(Request):
 
     opcode = 102
 
-    parts = ('token', Buffer)
+    parts = (('token', Buffer),)
 
 
 class SASLResponse(Response):
@@ -16,4 +16,4 @@ class SASLResponse(Response):
 
     opcode = 102
 
-    parts = ('token', Buffer)
+    parts = (('token', Buffer),)
@@ -1,6 +1,5 @@
 import logging
 import struct
-from io import BytesIO
 
 from aiozk import exc
 
@@ -39,35 +38,17 @@ class TransactionRequest(Request):
         self.requests.append(request)
 
     def serialize(self, xid=None):
-        buff = BytesIO()
-
-        formats = []
-        data = []
-        if xid is not None:
-            formats.append(Int.fmt)
-            data.append(xid)
-        if self.opcode:
-            formats.append(Int.fmt)
-            data.append(self.opcode)
+        chunks = [self.serialize_preamble(xid)]
 
         for request in self.requests:
             header = MultiHeader(type=request.opcode, done=False, error=-1)
-            header_format, header_data = header.render()
-            formats.append(header_format)
-            data.extend(header_data)
-
-            payload_format, payload_data = request.render()
-            formats.append(payload_format)
-            data.extend(payload_data)
+            chunks.append(header.encode())
+            chunks.append(request.encode())
 
         footer = MultiHeader(type=-1, done=True, error=-1)
-        footer_format, footer_data = footer.render()
-        formats.append(footer_format)
-        data.extend(footer_data)
+        chunks.append(footer.encode())
 
-        buff.write(struct.pack('!' + ''.join(formats), *data))
-
-        return buff.getvalue()
+        return b''.join(chunks)
 
     def __str__(self):
         return 'Txn[%s]' % ', '.join(map(str, self.requests))
@@ -83,10 +64,10 @@ class TransactionResponse(Response):
         self.responses = []
 
     @classmethod
-    def deserialize(cls, raw_bytes):
+    def deserialize(cls, raw_bytes, offset=0):
         instance = cls()
 
-        header, offset = MultiHeader.parse(raw_bytes, 0)
+        header, offset = MultiHeader.parse(raw_bytes, offset)
         while not header.done:
             if header.type == -1:
                 error_code = error_struct.unpack_from(raw_bytes, offset)[0]
@@ -106,3 +87,27 @@ class TransactionResponse(Response):
 
     def __str__(self):
         return 'Txn[%s]' % ', '.join(map(str, self.responses))
+
+
+class MultiReadRequest(TransactionRequest):
+    """
+    Batch of ``GetDataRequest`` and ``GetChildrenRequest`` answered in one
+    reply, available since Zookeeper 3.6.0.
+    """
+
+    opcode = 22
+
+    def __str__(self):
+        return 'MultiRead[%s]' % ', '.join(map(str, self.requests))
+
+
+class MultiReadResponse(TransactionResponse):
+    """
+    Unlike a transaction, every read succeeds or fails on its own, failed
+    reads are represented by their exception.
+    """
+
+    opcode = 22
+
+    def __str__(self):
+        return 'MultiRead[%s]' % ', '.join(map(str, self.responses))
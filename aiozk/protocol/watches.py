@@ -49,6 +49,60 @@ class SetWatchesResponse(Response):
     parts = ()
 
 
+class SetWatches2Request(Request):
+    """
+    Like ``SetWatchesRequest`` but also restores persistent watches,
+    available since Zookeeper 3.6.0.
+    """
+
+    opcode = 105
+
+    parts = (
+        ('relative_zxid', Long),
+        ('data_watches', Vector.of(UString)),
+        ('exist_watches', Vector.of(UString)),
+        ('child_watches', Vector.of(UString)),
+        ('persistent_watches', Vector.of(UString)),
+        ('persistent_recursive_watches', Vector.of(UString)),
+    )
+
+
+class SetWatches2Response(Response):
+    """ """
+
+    opcode = 105
+
+    parts = ()
+
+
+class AddWatchRequest(Request):
+    """
+    Adds a persistent watch, available since Zookeeper 3.6.0.
+
+    A persistent watch is not removed when it is triggered.  A persistent
+    recursive watch also triggers for all descendants of the path, except
+    for ``CHILDREN_CHANGED`` events.
+    """
+
+    opcode = 106
+
+    PERSISTENT = 0
+    PERSISTENT_RECURSIVE = 1
+
+    parts = (
+        ('path', UString),
+        ('mode', Int),
+    )
+
+
+class AddWatchResponse(Response):
+    """ """
+
+    opcode = 106
+
+    parts = ()
+
+
 class CheckWatchesRequest(Request):
     """ """
 
@@ -69,10 +123,19 @@ class CheckWatchesResponse(Response):
 
 
 class RemoveWatchesRequest(Request):
-    """ """
+    """
+    Removes the watches of the given type set on a path by this session,
+    available since Zookeeper 3.5.0.
+
+    ``ANY`` also removes persistent watches.
+    """
 
     opcode = 18
 
+    CHILDREN = 1
+    DATA = 2
+    ANY = 3
+
     parts = (
         ('path', UString),
         ('type', Int),
@@ -45,6 +45,7 @@ class BaseWatcher(Recipe):
             except exc.NoNode:
                 result = exc.NoNode
             except exc.ZKError as e:
+                watch_future.cancel()
                 log.exception('Exception in watch loop: %s', e)
                 log.info('Waiting for safe state...')
                 await self.client.session.ensure_safe_state()
@@ -2,7 +2,7 @@ import logging
 
 from aiozk import exc
 
-from .recipe import Recipe
+from .recipe import Recipe, as_bytes
 
 
 log = logging.getLogger(__name__)
@@ -20,7 +20,7 @@ class Counter(Recipe):
     async def _fetch(self):
         data, stat = await self.client.get(self.base_path)
         self._version = stat.version
-        self.value = self.numeric_type(data)
+        self.value = self.numeric_type(as_bytes(data))
         return (self.value, stat.version)
 
     async def start(self):
@@ -4,6 +4,7 @@ from aiozk import WatchEvent
 from aiozk.exc import NoNode
 
 from .base_watcher import BaseWatcher
+from .recipe import as_bytes
 
 
 class DataWatcher(BaseWatcher):
@@ -23,4 +24,4 @@ class DataWatcher(BaseWatcher):
             if not exists:
                 raise NoNode
         data = await self.client.get_data(path=path, watch=not watch_via_exists)
-        return data
+        return as_bytes(data)
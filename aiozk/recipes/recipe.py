@@ -3,6 +3,18 @@ from typing import ClassVar
 from aiozk import exc
 
 
+def as_bytes(data):
+    """
+    Returns znode data as ``bytes``.
+
+    Clients created with ``zero_copy=True`` return data as a ``memoryview``,
+    recipes parse and keep data around so they work on a copy.
+    """
+    if isinstance(data, memoryview):
+        return bytes(data)
+    return data
+
+
 class Recipe:
     sub_recipes: ClassVar = {}
 
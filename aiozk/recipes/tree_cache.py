@@ -5,7 +5,7 @@ from typing import ClassVar
 from ..exc import NoNode
 from .children_watcher import ChildrenWatcher
 from .data_watcher import DataWatcher
-from .recipe import Recipe
+from .recipe import Recipe, as_bytes
 
 
 log = logging.getLogger(__name__)
@@ -76,7 +76,7 @@ class ZNodeCache:
         return self.children[name]
 
     async def start(self):
-        self.data = await self.client.get_data(self.path)
+        self.data = as_bytes(await self.client.get_data(self.path))
         for child in await self.client.get_children(self.path):
             self.children[child] = ZNodeCache(
                 self.path + '/' + child,
@@ -1,14 +1,18 @@
 import asyncio
-import collections
 import logging
 import random
 import re
+from contextlib import suppress
 
 from aiozk import exc, protocol
 
 from .connection import Connection
+from .features import Features
+from .hooks import Hooks
 from .retry import RetryPolicy
 from .states import SessionStateMachine, States
+from .watches import WatchRegistry, split_watches
+from .window import RequestWindow
 
 
 DEFAULT_ZOOKEEPER_PORT = 2181
@@ -17,12 +21,37 @@ MAX_FIND_WAIT = 60  # in seconds
 
 HEARTBEAT_FREQUENCY = 3  # heartbeats per timeout interval
 
+# reads answered once for all the identical ones in flight at the same time
+COALESCED_REQUESTS = (
+    protocol.ExistsRequest,
+    protocol.GetDataRequest,
+    protocol.GetChildrenRequest,
+    protocol.GetChildren2Request,
+    protocol.GetACLRequest,
+)
+
 
 log = logging.getLogger(__name__)
 
 
 class Session:
-    def __init__(self, servers, timeout, retry_policy, allow_read_only, read_timeout):
+    def __init__(
+        self,
+        servers,
+        timeout,
+        retry_policy,
+        allow_read_only,
+        read_timeout,
+        zero_copy=False,
+        write_batch_bytes=None,
+        max_in_flight=None,
+        max_buffered_bytes=None,
+        server_version=None,
+        connect_race_delay=None,
+        standby=False,
+        metrics=None,
+        slow_request_threshold=None,
+    ):
         self.hosts = []
         for server in servers.split(','):
             ipv6_match = re.match(r'\[(.*)\]:(\d+)$', server)
@@ -49,15 +78,48 @@ class Session:
         self.timeout = timeout
         self.password = b'\x00'
         self.read_timeout = read_timeout
+        self.zero_copy = zero_copy
+        self.write_batch_bytes = write_batch_bytes
+        self.max_buffered_bytes = max_buffered_bytes
+
+        self.window = RequestWindow(max_in_flight)
+
+        # `aiozk.metrics.Metrics` instance shared by all connections
+        self.metrics = metrics
+        # request lifecycle callbacks, shared by all connections
+        self.hooks = Hooks()
+        self.slow_request_threshold = slow_request_threshold
+
+        # server versions known up front or from an earlier 'srvr' probe,
+        # connecting to a known server skips the probe
+        if isinstance(server_version, str):
+            server_version = tuple(int(part) for part in server_version.split('.')[:3])
+        self.server_version = server_version
+        self.server_versions = {}
+
+        # if set, connection attempts to several servers are raced, starting
+        # a new one every connect_race_delay seconds
+        self.connect_race_delay = connect_race_delay
+
+        # if set, a connection to another server is kept open so that the
+        # session can be re-established on it right away
+        self.standby = standby
+        self.standby_conn = None
+        # asyncio.Task object
+        self.standby_task = None
 
         self.repair_loop_task = None
 
-        # asyncio.TimerHandle object
+        # asyncio.TimerHandle object of the periodic heartbeat check
         self.heartbeat_handle = None
         # asyncio.Task object
         self.heartbeat_task = None
 
-        self.watch_callbacks = collections.defaultdict(set)
+        self.watches = WatchRegistry()
+
+        # futures of the coalesced reads in flight, keyed by
+        # (opcode, path, watch)
+        self.reads_in_flight = {}
 
         self.started = False
         self.closing = False
@@ -103,21 +165,18 @@ class Session:
 
         retry_policy = RetryPolicy.exponential_backoff(maximum=MAX_FIND_WAIT)
 
+        conn = self.take_standby(allow_read_only)
         while not conn:
             await retry_policy.enforce()
 
             servers = random.sample(self.hosts, len(self.hosts))
-            for host, port in servers:
-                log.info('Connecting to %s:%s', host, port)
-                conn = await self.make_connection(host, port)
-                if not conn:
-                    continue
-                elif conn.start_read_only and not allow_read_only:
-                    _ = asyncio.create_task(conn.close(self.timeout))  # noqa: RUF006
-                    conn = None
-                    continue
-                log.info('Connected to %s:%s', host, port)
-                break
+            if self.connect_race_delay is None:
+                for host, port in servers:
+                    conn = await self.try_server(host, port, allow_read_only)
+                    if conn:
+                        break
+            else:
+                conn = await self.race_servers(servers, allow_read_only)
 
             if not conn:
                 log.warning('No servers available, will keep trying.')
@@ -129,13 +188,144 @@ class Session:
             log.debug('Close old connection')
             _ = asyncio.create_task(old_conn.close(self.timeout))  # noqa: RUF006
 
+    async def try_server(self, host, port, allow_read_only):
+        """
+        Returns a connection to the server if it is usable, otherwise None.
+        """
+        log.info('Connecting to %s:%s', host, port)
+        conn = await self.make_connection(host, port)
+        if not conn:
+            return
+        elif conn.start_read_only and not allow_read_only:
+            _ = asyncio.create_task(conn.close(self.timeout))  # noqa: RUF006
+            return
+        log.info('Connected to %s:%s', host, port)
+        return conn
+
+    async def race_servers(self, servers, allow_read_only):
+        """
+        Races connection attempts to the given servers.
+
+        A new attempt is started every ``connect_race_delay`` seconds, or
+        as soon as an attempt fails.  The first usable connection wins, the
+        remaining attempts are cancelled and extra connections are closed.
+        """
+        servers = iter(servers)
+        attempts = set()
+        winner = None
+
+        try:
+            while winner is None:
+                server = next(servers, None)
+                if server is not None:
+                    attempts.add(asyncio.create_task(self.try_server(*server, allow_read_only)))
+                if not attempts:
+                    break
+
+                done, attempts = await asyncio.wait(
+                    attempts,
+                    timeout=self.connect_race_delay if server is not None else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for attempt in done:
+                    conn = attempt.result()
+                    if conn and winner is None:
+                        winner = conn
+                    elif conn:
+                        _ = asyncio.create_task(conn.close(self.timeout))  # noqa: RUF006
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+            for attempt in attempts:
+                with suppress(asyncio.CancelledError):
+                    conn = await attempt
+                    if conn:
+                        _ = asyncio.create_task(conn.close(self.timeout))  # noqa: RUF006
+
+        return winner
+
+    def start_standby(self):
+        if not self.standby or len(self.hosts) < 2:
+            return
+        if self.standby_task and not self.standby_task.done():
+            return
+        self.standby_task = asyncio.create_task(self.keep_standby())
+
+    async def stop_standby(self):
+        if self.standby_task and not self.standby_task.done():
+            self.standby_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.standby_task
+        self.standby_task = None
+
+    def take_standby(self, allow_read_only):
+        """
+        Hands over the standby connection if it is still usable.
+        """
+        conn = self.standby_conn
+        if conn is None:
+            return
+        self.standby_conn = None
+        if self.standby_task and not self.standby_task.done():
+            self.standby_task.cancel()
+        self.standby_task = None
+
+        if conn.closing or (conn.start_read_only and not allow_read_only):
+            _ = asyncio.create_task(conn.close(self.timeout))  # noqa: RUF006
+            return
+        log.info('Switching to standby connection to %s:%s', conn.host, conn.port)
+        return conn
+
+    async def keep_standby(self):
+        """
+        Keeps a connection open to a server other than the current one.
+
+        The connection is opened but no session is established on it, that
+        only happens once it is taken over by `find_server()`.  Servers
+        close such connections after a while, they are reopened.
+        """
+        retry_policy = RetryPolicy.exponential_backoff(maximum=MAX_FIND_WAIT)
+
+        while not self.closing:
+            await retry_policy.enforce()
+
+            current = (self.conn.host, self.conn.port) if self.conn else None
+            servers = [(host, port) for host, port in self.hosts if (host, int(port)) != current]
+            host, port = random.choice(servers)
+
+            conn = await self.try_server(host, port, self.allow_read_only)
+            if not conn:
+                continue
+
+            self.standby_conn = conn
+            retry_policy.clear(None)
+            try:
+                await conn.wait_lost()
+                log.info('Standby connection to %s:%s lost', host, port)
+            finally:
+                if self.standby_conn is conn:
+                    self.standby_conn = None
+                    _ = asyncio.create_task(conn.close(self.timeout))  # noqa: RUF006
+
     async def make_connection(self, host, port):
-        conn = Connection(host, port, watch_handler=self.event_dispatch, read_timeout=self.read_timeout)
+        conn = Connection(
+            host,
+            port,
+            watch_handler=self.event_dispatch,
+            read_timeout=self.read_timeout,
+            zero_copy=self.zero_copy,
+            write_batch_bytes=self.write_batch_bytes,
+            max_buffered_bytes=self.max_buffered_bytes,
+            metrics=self.metrics,
+            hooks=self.hooks,
+            slow_request_threshold=self.slow_request_threshold,
+        )
         try:
-            await conn.connect()
+            await conn.connect(version_info=self.server_version or self.server_versions.get((host, port)))
         except Exception:
             log.exception("Couldn't connect to %s:%s", host, port)
             return
+        self.server_versions[host, port] = conn.version_info
         return conn
 
     async def establish_session(self):
@@ -173,6 +363,9 @@ class Session:
         self.password = response.password
         self.timeout = response.timeout / 1000
 
+        if response.read_only is not None:
+            self.conn.start_read_only = response.read_only
+
         self.last_zxid = zxid
 
     async def repair_loop(self):
@@ -195,40 +388,103 @@ class Session:
                 self.password = b'\x00'
                 continue
 
+            # written before any request waiting for the connection
+            restoring = self.restore_watches()
+
             if self.conn.start_read_only:
                 self.state.transition_to(States.READ_ONLY)
             else:
                 self.state.transition_to(States.CONNECTED)
 
-            self.conn.start_read_loop()
-            await self.set_existing_watches()
+            if self.metrics is not None:
+                self.metrics.connections += 1
+
+            self.start_standby()
+
+            await self.wait_watches_restored(restoring)
+
+    def next_xid(self):
+        self.xid += 1
+        if self.xid > 0x7FFFFFFF:
+            # xid should not exceed the maximum of 32 bit signed integer
+            # and it should be positive value because a few negative
+            # values are special xid.
+            self.xid = 1
+        return self.xid
 
     async def send(self, request):
+        """
+        Sends a request and returns the response, or the error code of the
+        reply if ``error_codes`` is set on the request.
+
+        A read identical to one in flight shares its response instead of
+        being sent too.  Replies come in the order requests are sent, so
+        the shared response is never older than the replies the caller
+        already got.
+        """
+        if type(request) not in COALESCED_REQUESTS:
+            return await self.send_request(request)
+
+        key = (request.opcode, request.path, getattr(request, 'watch', False), request.error_codes)
+        while key in self.reads_in_flight:
+            f = self.reads_in_flight[key]
+            if self.metrics is not None:
+                self.metrics.coalesced[request.opcode] += 1
+            try:
+                return await asyncio.shield(f)
+            except asyncio.CancelledError:
+                if not f.cancelled():
+                    raise
+                # the caller sending the read was cancelled
+
+        f = asyncio.get_running_loop().create_future()
+        self.reads_in_flight[key] = f
+        try:
+            response = await self.send_request(request)
+        except asyncio.CancelledError:
+            f.cancel()
+            raise
+        except Exception as e:
+            f.set_exception(e)
+            # retrieved, whether or not other callers wait for it
+            f.exception()
+            raise
+        finally:
+            if self.reads_in_flight.get(key) is f:
+                del self.reads_in_flight[key]
+        f.set_result(response)
+        return response
+
+    async def send_request(self, request):
         response = None
         while not response:
             await self.retry_policy.enforce(request)
             await self.ensure_safe_state(writing=request.writes_data)
 
             try:
-                self.xid += 1
-                if self.xid > 0x7FFFFFFF:
-                    # xid should not exceed the maximum of 32 bit signed integer
-                    # and it should be positive value because a few negative
-                    # values are special xid.
-                    self.xid = 1
-                zxid, response = await self.conn.send(request, xid=self.xid)
+                async with self.window:
+                    await self.conn.wait_writable()
+                    self.watches.track(request)
+                    zxid, response = await self.conn.send(request, xid=self.next_xid())
                 self.last_zxid = zxid
-                self.set_heartbeat()
                 self.retry_policy.clear(request)
-            except (exc.NodeExists, exc.NoNode, exc.NotEmpty, exc.BadVersion):
+            except (exc.NodeExists, exc.NoNode, exc.NotEmpty, exc.BadVersion, exc.NoWatcher):
                 self.retry_policy.clear(request)
                 raise
             except asyncio.CancelledError:
                 self.retry_policy.clear(request)
                 raise
-            except exc.ConnectError:
+            except exc.ConnectError as e:
                 if self.state != States.SUSPENDED:
                     self.state.transition_to(States.SUSPENDED)
+                if self.hooks.on_retry:
+                    self.hooks.fire(
+                        'on_retry',
+                        request=request,
+                        opcode=request.opcode,
+                        path=getattr(request, 'path', None),
+                        error=e,
+                    )
             except Exception as e:
                 log.exception('Send exception: %s', e)
                 self.retry_policy.clear(request)
@@ -236,11 +492,34 @@ class Session:
         return response
 
     def set_heartbeat(self):
-        timeout = self.timeout / HEARTBEAT_FREQUENCY
+        """
+        Starts the periodic heartbeat check unless it is already running.
+        """
         if self.heartbeat_handle:
-            self.heartbeat_handle.cancel()
+            return
         loop = asyncio.get_running_loop()
-        self.heartbeat_handle = loop.call_later(timeout, self.create_heartbeat)
+        self.heartbeat_handle = loop.call_later(self.timeout / HEARTBEAT_FREQUENCY, self.check_heartbeat)
+
+    def check_heartbeat(self):
+        """
+        Sends a ping unless data was both sent and received recently.
+
+        Runs once per heartbeat interval at most, instead of a timer being
+        re-armed after every request.
+        """
+        interval = self.timeout / HEARTBEAT_FREQUENCY
+        loop = asyncio.get_running_loop()
+
+        idle = interval
+        if self.conn and self.conn.last_sent is not None and self.conn.last_received is not None:
+            idle = loop.time() - min(self.conn.last_sent, self.conn.last_received)
+
+        if idle >= interval:
+            self.create_heartbeat()
+            delay = interval
+        else:
+            delay = interval - idle
+        self.heartbeat_handle = loop.call_later(delay, self.check_heartbeat)
 
     def create_heartbeat(self):
         if not self.heartbeat_task or self.heartbeat_task.done():
@@ -262,25 +541,67 @@ class Session:
         except Exception as e:
             log.exception('in heartbeat: %s', e)
             raise e
-        finally:
-            self.set_heartbeat()
 
     def add_watch_callback(self, event_type, path, callback):
-        self.watch_callbacks[event_type, path].add(callback)
+        self.watches.add_callback(event_type, path, callback)
 
     def remove_watch_callback(self, event_type, path, callback):
-        self.watch_callbacks[event_type, path].discard(callback)
-        if not self.watch_callbacks[event_type, path]:
-            self.watch_callbacks.pop((event_type, path))
+        for watcher_type in self.watches.remove_callback(event_type, path, callback):
+            self.remove_server_watch(path, watcher_type)
+
+    def add_persistent_watch(self, mode, path, callback):
+        self.watches.add_persistent(mode, path, callback)
+
+    def remove_persistent_watch(self, mode, path, callback):
+        """
+        Returns True if no callbacks are left for the watch.
+        """
+        if not self.watches.remove_persistent(mode, path, callback):
+            return False
+        if not self.watches.has_callbacks(path):
+            # no one listens on the path anymore, ANY removes the one-shot
+            # watches left on it too
+            self.watches.forget_server_watches(path)
+            self.remove_server_watch(path, protocol.RemoveWatchesRequest.ANY)
+        return True
+
+    def remove_server_watch(self, path, watcher_type):
+        """
+        Removes a watch that no callback listens to from the server.
+
+        The request is written right away, bypassing the request window, so
+        that it can't overtake a later request setting the watch again.
+        Without a connection there is nothing to do, watches without
+        callbacks are not restored on reconnect.
+        """
+        if self.state.current_state not in (States.CONNECTED, States.READ_ONLY) or self.conn.closing:
+            return
+        if not Features(self.conn.version_info).remove_watches:
+            return
+
+        request = protocol.RemoveWatchesRequest(path=path, type=watcher_type)
+        f = self.conn.send(request, xid=self.next_xid())
+        f.add_done_callback(self.server_watch_removed)
+
+    def server_watch_removed(self, f):
+        if f.cancelled():
+            return
+        e = f.exception()
+        if e is not None and not isinstance(e, exc.NoWatcher):
+            log.debug('Failed to remove watch: %r', e)
 
     def event_dispatch(self, event):
         log.debug('Got watch event: %s', event)
 
         if event.type:
+            callbacks = self.watches.event_callbacks(event)
+            for listener in self.watches.listeners:
+                listener(event)
             loop = asyncio.get_running_loop()
-            key = (event.type, event.path)
-            for callback in self.watch_callbacks[key]:
+            for callback in callbacks:
                 loop.call_soon(callback, event.path)
+            for callback in self.watches.persistent_callbacks(event):
+                loop.call_soon(callback, event)
             return
 
         if event.state == protocol.WatchEvent.DISCONNECTED:
@@ -301,26 +622,48 @@ class Session:
             log.info("Got 'connected' watch event.")
             self.state.transition_to(States.CONNECTED)
 
-    async def set_existing_watches(self):
-        if not self.watch_callbacks:
-            return
-
-        request = protocol.SetWatchesRequest(
-            relative_zxid=self.last_zxid or 0,
-            data_watches=[],
-            exist_watches=[],
-            child_watches=[],
-        )
-
-        for event_type, path in self.watch_callbacks.keys():
-            if event_type == protocol.WatchEvent.CREATED:
-                request.exist_watches.append(path)
-            if event_type == protocol.WatchEvent.DATA_CHANGED:
-                request.data_watches.append(path)
-            elif event_type == protocol.WatchEvent.CHILDREN_CHANGED:
-                request.child_watches.append(path)
-
-        await self.send(request)
+    def restore_watches(self):
+        """
+        Sets the watches with callbacks again on a new connection.
+
+        The paths are split into size bounded ``SetWatches`` requests that
+        are all written at once, bypassing the request window, so that they
+        reach the server before any other request.  Returns the futures of
+        the replies.
+        """
+        futures = []
+        restored = 0
+        for watches in split_watches(self.watches.restore()):
+            if watches['persistent_watches'] or watches['persistent_recursive_watches']:
+                request = protocol.SetWatches2Request(relative_zxid=self.last_zxid or 0, **watches)
+            else:
+                del watches['persistent_watches']
+                del watches['persistent_recursive_watches']
+                request = protocol.SetWatchesRequest(relative_zxid=self.last_zxid or 0, **watches)
+            f = self.conn.send(request, xid=self.next_xid())
+            f.add_done_callback(self.watches_restored)
+            futures.append(f)
+            restored += sum(len(paths) for paths in watches.values())
+
+        if futures:
+            log.info('Restoring %d watches with %d requests', restored, len(futures))
+            if self.metrics is not None:
+                self.metrics.watch_restore_requests += len(futures)
+                self.metrics.watch_restore_pending += len(futures)
+                self.metrics.watches_restored += restored
+        return futures
+
+    def watches_restored(self, f):
+        # a failure is only logged, losing the connection triggers another
+        # restoration on the next one
+        if self.metrics is not None:
+            self.metrics.watch_restore_pending -= 1
+        if not f.cancelled() and f.exception() is not None:
+            log.warning('Failed to restore watches: %r', f.exception())
+
+    async def wait_watches_restored(self, futures):
+        if futures:
+            await asyncio.wait(futures)
 
     async def close(self):
         if not self.started:
@@ -329,6 +672,7 @@ class Session:
         if self.closing:
             return
         self.closing = True
+        await self.stop_standby()
         if self.repair_loop_task:
             self.repair_loop_task.cancel()
             await asyncio.wait_for(self.send(protocol.CloseRequest()), self.timeout)
@@ -44,7 +44,10 @@ class SessionStateMachine:
 
         log.debug('Session transition: %s -> %s', self.current_state, state)
 
-        self.current_state = state
+        old_state, self.current_state = self.current_state, state
+
+        if self.session.hooks.on_state_change:
+            self.session.hooks.fire('on_state_change', old=old_state, new=state)
 
         for future in drain(self.futures[state]):
             if not future.done():
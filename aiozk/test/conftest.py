@@ -5,6 +5,7 @@ import uuid
 import pytest
 
 from aiozk import ZKClient, exc
+from aiozk.protocol.stat import Stat
 from aiozk.states import States
 
 
@@ -22,16 +23,7 @@ def get_client(servers):
 
 
 async def get_tree(client, curr='/'):
-    out = [
-        curr,
-    ]
-    children = await client.get_children(curr)
-    for c in children:
-        # eliminate double slash: //root = '/'.join('/', 'root')
-        if curr == '/':
-            curr = ''
-        out.extend(await get_tree(client, '/'.join([curr, c])))
-    return out
+    return [path async for path, _, _, _ in client.walk(curr, order='dfs')]
 
 
 async def dump_tree(client, base='/'):
@@ -40,6 +32,23 @@ async def dump_tree(client, base='/'):
     return out
 
 
+@pytest.fixture
+def stat():
+    return Stat(
+        created_zxid=1,
+        last_modified_zxid=2,
+        created=3,
+        modified=4,
+        version=5,
+        child_version=6,
+        acl_version=7,
+        ephemeral_owner=8,
+        data_length=9,
+        num_children=10,
+        last_modified_children=11,
+    )
+
+
 @pytest.fixture
 def path():
     return f'/{uuid.uuid4().hex}'
@@ -0,0 +1,131 @@
+from unittest import mock
+
+from aiozk import protocol
+from aiozk.cache import DataCache, ExistsCache, LRUCache, StatCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert len(cache) == 2
+    assert cache.stats() == {
+        'size': 2,
+        'max_size': 2,
+        'bytes': 0,
+        'max_bytes': None,
+        'hits': 1,
+        'misses': 1,
+        'evictions': 1,
+    }
+
+
+def test_lru_disabled_and_unbounded():
+    disabled = LRUCache(0)
+    disabled.set('a', 1)
+    assert 'a' not in disabled
+
+    unbounded = LRUCache(None)
+    for i in range(1000):
+        unbounded.set(i, i)
+    assert len(unbounded) == 1000
+    assert unbounded.evictions == 0
+
+
+def test_stat_cache_invalidated_by_event():
+    cache = StatCache(10)
+    cache.set('/a', object())
+    cache.set('/b', object())
+
+    cache.event_received(protocol.WatchEvent(type=protocol.WatchEvent.DATA_CHANGED, state=3, path='/a'))
+
+    assert '/a' not in cache
+    assert '/b' in cache
+
+
+def test_lru_bytes_bound():
+    cache = LRUCache(max_bytes=10)
+    cache.set('a', 'a', 4)
+    cache.set('b', 'b', 4)
+    cache.set('c', 'c', 4)
+    assert list(cache.entries) == ['b', 'c']
+    assert cache.bytes == 8
+
+    assert not cache.set('big', 'big', 11)
+    assert 'big' not in cache
+
+    cache.pop('b')
+    assert cache.bytes == 4
+
+
+def event(event_type, path):
+    return protocol.WatchEvent(type=event_type, state=3, path=path)
+
+
+def test_data_cache_fetch_and_invalidate():
+    session = mock.Mock()
+    cache = DataCache(session, max_size=10)
+    key = (DataCache.DATA, '/a')
+
+    cache.fetch_started(key)
+    session.add_watch_callback.assert_any_call(protocol.WatchEvent.DATA_CHANGED, '/a', DataCache.watched)
+    cache.fetch_done(key, (b'data', None))
+    assert cache.get(key) == (b'data', None)
+    assert cache.bytes == 4
+    session.remove_watch_callback.assert_not_called()
+
+    cache.event_received(event(protocol.WatchEvent.CHILDREN_CHANGED, '/a'))
+    assert key in cache
+
+    cache.event_received(event(protocol.WatchEvent.DATA_CHANGED, '/a'))
+    assert key not in cache
+    session.remove_watch_callback.assert_any_call(protocol.WatchEvent.DATA_CHANGED, '/a', DataCache.watched)
+
+
+def test_data_cache_invalidated_while_fetching():
+    session = mock.Mock()
+    cache = DataCache(session, max_size=10)
+    key = (DataCache.CHILDREN, '/a')
+
+    cache.fetch_started(key)
+    cache.event_received(event(protocol.WatchEvent.DELETED, '/a'))
+    cache.fetch_done(key, ('x',))
+
+    assert key not in cache
+    assert not cache.fetching
+    assert not cache.stale
+    session.remove_watch_callback.assert_any_call(protocol.WatchEvent.CHILDREN_CHANGED, '/a', DataCache.watched)
+
+
+def test_data_cache_eviction_removes_watch():
+    session = mock.Mock()
+    cache = DataCache(session, max_size=1)
+    for path in ('/a', '/b'):
+        cache.fetch_started((DataCache.DATA, path))
+        cache.fetch_done((DataCache.DATA, path), (None, None))
+
+    assert list(cache.entries) == [(DataCache.DATA, '/b')]
+    removed = {c.args[1] for c in session.remove_watch_callback.call_args_list}
+    assert removed == {'/a'}
+
+
+def test_exists_cache_invalidated_by_creation():
+    session = mock.Mock()
+    cache = ExistsCache(session, max_size=10)
+    key = (ExistsCache.MISSING, '/a')
+
+    cache.fetch_started(key)
+    session.add_watch_callback.assert_called_once_with(protocol.WatchEvent.CREATED, '/a', ExistsCache.watched)
+    cache.fetch_done(key, True)
+    assert cache.get(key)
+
+    cache.event_received(event(protocol.WatchEvent.DELETED, '/a'))
+    assert key in cache
+    cache.event_received(event(protocol.WatchEvent.CREATED, '/a'))
+    assert key not in cache
+    session.remove_watch_callback.assert_called_once_with(protocol.WatchEvent.CREATED, '/a', ExistsCache.watched)
@@ -5,7 +5,8 @@ from contextlib import suppress
 
 import pytest
 
-from aiozk import WatchEvent
+from aiozk import WatchEvent, ZKClient, exc
+from aiozk.client import split_paths
 
 from .conftest import get_client
 
@@ -98,3 +99,235 @@ async def test_raw_set(full_zk, path):
     stat = await full_zk.set(path, 'asdf', -1)
     assert stat.data_length == 4
     assert stat.version == 1
+
+
+@pytest.mark.asyncio
+async def test_get_many(zk, path):
+    await zk.create(path)
+    paths = [f'{path}/{i}' for i in range(20)]
+    for i, child in enumerate(paths):
+        await zk.create(child, data=str(i))
+    missing = f'{path}/missing'
+
+    try:
+        results = await zk.get_many([*paths, missing], concurrency=4)
+        assert [data for data, _ in results[:-1]] == [str(i).encode() for i in range(20)]
+        assert isinstance(results[-1], exc.NoNode)
+
+        assert await zk.exists_many([path, missing]) == [True, False]
+
+        children = await zk.get_children_many([path, paths[0], missing])
+        assert sorted(children[0]) == sorted(str(i) for i in range(20))
+        assert children[1] == []
+        assert isinstance(children[2], exc.NoNode)
+    finally:
+        await zk.deleteall(path)
+
+
+@pytest.mark.asyncio
+async def test_iter_many(zk, path):
+    await zk.create(path)
+    paths = [f'{path}/{i}' for i in range(10)]
+    for child in paths:
+        await zk.create(child)
+
+    try:
+        seen = {}
+        async for child, result in zk.iter_many(zk.exists, (child for child in paths), concurrency=3):
+            seen[child] = result
+        assert seen == dict.fromkeys(paths, True)
+    finally:
+        await zk.deleteall(path)
+
+
+@pytest.mark.asyncio
+async def test_stat_cache(zk, path, servers):
+    await zk.create(path)
+    try:
+        await zk.get(path)
+        # keyed by the path sent to the server, including the chroot
+        assert zk.normalize_path(path) in zk.stat_cache
+
+        other = get_client(servers)
+        await other.start()
+        try:
+            await other.set_data(path, b'changed')
+        finally:
+            await other.close()
+
+        with pytest.raises(exc.BadVersion):
+            await zk.set_data(path, b'stale')
+        assert zk.normalize_path(path) not in zk.stat_cache
+
+        await zk.set_data(path, b'fresh', force=True)
+        await zk.delete(path)
+        assert zk.normalize_path(path) not in zk.stat_cache
+    finally:
+        with suppress(exc.NoNode):
+            await zk.delete(path, force=True)
+
+    assert zk.stats()['stat_cache']['hits'] >= 1
+
+
+@pytest.mark.asyncio
+async def test_data_cache(path, servers):
+    zk = ZKClient(servers, chroot='/test_aiozk', data_cache_size=10)
+    other = get_client(servers)
+    await zk.start()
+    await other.start()
+    await zk.create(path, data=b'1')
+    try:
+        assert await zk.get_data(path) == b'1'
+        assert await zk.get_data(path) == b'1'
+        assert await zk.get_children(path) == []
+        assert zk.stats()['data_cache']['hits'] == 1
+
+        await other.set_data(path, b'2')
+        await other.create(f'{path}/child')
+
+        async def wait_for_data():
+            while await zk.get_data(path) != b'2':  # noqa: ASYNC110
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(wait_for_data(), 1)
+        assert await zk.get_children(path) == ['child']
+    finally:
+        await zk.deleteall(path)
+        await other.close()
+        await zk.close()
+
+
+@pytest.mark.asyncio
+async def test_exists_cache(path, servers):
+    zk = ZKClient(servers, chroot='/test_aiozk', exists_cache_size=10)
+    other = get_client(servers)
+    await zk.start()
+    await other.start()
+    try:
+        assert not await zk.exists(path)
+        assert not await zk.exists(path)
+        assert zk.stats()['exists_cache']['hits'] == 1
+
+        await other.create(path)
+
+        async def wait_for_creation():
+            while not await zk.exists(path):  # noqa: ASYNC110
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(wait_for_creation(), 1)
+        assert not zk.exists_cache
+    finally:
+        with suppress(exc.NoNode):
+            await other.delete(path)
+        await other.close()
+        await zk.close()
+
+
+@pytest.mark.asyncio
+async def test_exists_stat_and_try_get(zk, path):
+    missing = f'{path}/missing'
+    await zk.create(path, data=b'data')
+    try:
+        stat = await zk.exists_stat(path)
+        assert stat.data_length == 4
+        assert await zk.exists_stat(missing) is None
+
+        result = await zk.try_get(path)
+        assert result.ok
+        assert (bytes(result.data), result.stat.version) == (b'data', 0)
+
+        result = await zk.try_get(missing)
+        assert not result.ok
+        assert (result.data, result.stat, result.error) == (None, None, exc.NoNode)
+    finally:
+        await zk.delete(path)
+
+
+@pytest.mark.asyncio
+async def test_deleteall(zk, path):
+    await zk.create(path)
+    for child in ('a', 'a/1', 'a/2', 'b', 'b/1'):
+        await zk.create(f'{path}/{child}')
+    progress = []
+
+    deleted = await zk.deleteall(path, concurrency=2, progress=lambda *args: progress.append(args))
+
+    assert deleted == 6
+    assert progress[-1] == (6, 6)
+    assert not await zk.exists(path)
+    with pytest.raises(exc.NoNode):
+        await zk.deleteall(path)
+
+
+@pytest.mark.asyncio
+async def test_deleteall_batch_with_concurrent_changes(zk, path):
+    await zk.create(path)
+    await zk.create(f'{path}/full')
+    await zk.create(f'{path}/full/child')
+    await zk.create(f'{path}/empty')
+    try:
+        paths = [zk.normalize_path(f'{path}/{name}') for name in ('full', 'missing', 'empty')]
+        assert await zk.delete_batch(paths) == 3
+        assert await zk.get_children(path) == []
+    finally:
+        await zk.deleteall(path)
+
+
+@pytest.mark.asyncio
+async def test_ensure_path(zk, path):
+    leaf = f'{path}/a/b/c'
+    try:
+        await zk.ensure_path(leaf)
+        assert await zk.exists(leaf)
+        assert zk.normalize_path(f'{path}/a/b') in zk.known_paths
+
+        # an ancestor known to exist is gone
+        await zk.deleteall(f'{path}/a')
+        await zk.ensure_path(leaf)
+        assert await zk.exists(leaf)
+
+        await zk.ensure_path(f'{path}/a/d')
+        assert sorted(await zk.get_children(f'{path}/a')) == ['b', 'd']
+    finally:
+        await zk.deleteall(path)
+
+
+@pytest.mark.asyncio
+async def test_walk(zk, path):
+    await zk.create(path, b'root')
+    for child in ('a', 'a/1', 'a/1/x', 'a/2', 'b', 'b/1'):
+        await zk.create(f'{path}/{child}', child.encode())
+
+    try:
+        walked = [item async for item in zk.walk(path, concurrency=2)]
+        assert [item[0] for item in walked[:3]] == [path, f'{path}/a', f'{path}/b']
+        assert sorted(item[0] for item in walked[3:6]) == [f'{path}/a/1', f'{path}/a/2', f'{path}/b/1']
+        assert walked[6][0] == f'{path}/a/1/x'
+        _, data, stat, children = walked[1]
+        assert (data, stat.num_children, sorted(children)) == (b'a', 2, ['1', '2'])
+
+        walked = [item[0] async for item in zk.walk(path, order='dfs', concurrency=1)]
+        assert walked.index(f'{path}/a/1/x') == walked.index(f'{path}/a/1') + 1
+        assert walked.index(f'{path}/b/1') == walked.index(f'{path}/b') + 1
+        assert len(walked) == 7
+
+        walked = [item[0] async for item in zk.walk(path, max_depth=1)]
+        assert sorted(walked) == [path, f'{path}/a', f'{path}/b']
+
+        # stop walking before all reads in advance are walked
+        async for _ in zk.walk(path):
+            break
+    finally:
+        await zk.deleteall(path)
+
+    with pytest.raises(exc.NoNode):
+        async for _ in zk.walk(path):
+            pass
+
+
+def test_split_paths():
+    paths = ['/' + 'a' * 10, '/' + 'b' * 10, '/' + 'c' * 10]
+
+    assert split_paths(paths, 60) == [paths[:2], paths[2:]]
+    assert split_paths(paths, 10) == [[path] for path in paths]
+    assert split_paths([], 10) == []
@@ -1,9 +1,12 @@
 import asyncio
+import logging
 from unittest import mock
 
 import pytest
 
 import aiozk.connection
+from aiozk import exc, protocol
+from aiozk.metrics import Metrics
 
 
 @pytest.fixture
@@ -15,10 +18,15 @@ def connection():
         read_timeout=30,
     )
 
-    connection.writer = mock.MagicMock()
+    connection.transport = mock.MagicMock()
     return connection
 
 
+def reply_frame(xid, response, zxid=1, error_code=0):
+    payload = aiozk.connection.reply_header_struct.pack(xid, zxid, error_code) + response.encode()
+    return aiozk.connection.size_struct.pack(len(payload)) + payload
+
+
 @pytest.mark.asyncio
 async def test_close_connection_in_state_closing_do_not_performs_abort(connection):
     connection.abort = mock.AsyncMock()
@@ -30,13 +38,20 @@ async def test_close_connection_in_state_closing_do_not_performs_abort(connectio
 
 
 @pytest.mark.asyncio
-async def test_close_cancels_read_loop_task(connection):
-    loop = asyncio.get_running_loop()
-    connection.read_loop_task = loop.create_future()
-    connection.read_loop_task.done = mock.MagicMock(return_value=False)
-    connection.read_loop_task.cancel = mock.MagicMock(wraps=connection.read_loop_task.cancel)
-    await connection.close(0.1)
-    connection.read_loop_task.cancel.assert_called_once()
+async def test_close_waits_for_pending_replies(connection):
+    f = connection.send(protocol.DeleteRequest(path='/foo', version=-1), xid=1)
+    connection.abort = mock.MagicMock()
+
+    close_task = asyncio.create_task(connection.close(1))
+    await asyncio.sleep(0)
+    assert not close_task.done()
+
+    connection.data_received(reply_frame(1, protocol.DeleteResponse()))
+    await close_task
+
+    assert f.result() == (1, protocol.DeleteResponse())
+    connection.abort.assert_not_called()
+    connection.transport.close.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -45,3 +60,310 @@ async def test_connection_abort(connection):
     connection.abort = mock.MagicMock()
     await connection.close(0.1)
     connection.abort.assert_called_once()
+
+
+@pytest.mark.parametrize('zero_copy', [False, True])
+@pytest.mark.asyncio
+async def test_data_received(connection, stat, zero_copy):
+    connection.zero_copy = zero_copy
+    get_data = connection.send(protocol.GetDataRequest(path='/foo', watch=False), xid=1)
+    exists = connection.send(protocol.ExistsRequest(path='/bar', watch=False), xid=2)
+
+    raw = reply_frame(1, protocol.GetDataResponse(data=b'payload', stat=stat))
+    raw += reply_frame(2, protocol.DeleteResponse(), error_code=exc.NoNode.error_code)
+    # all complete frames are parsed in one pass, the rest is kept
+    connection.data_received(raw[:-3])
+    assert get_data.done()
+    assert not exists.done()
+
+    connection.data_received(raw[-3:])
+    _, response = get_data.result()
+    assert isinstance(response.data, memoryview if zero_copy else bytes)
+    assert bytes(response.data) == b'payload'
+    assert response.stat == stat
+    with pytest.raises(exc.NoNode):
+        exists.result()
+    assert not connection.read_buffer
+
+
+@pytest.mark.asyncio
+async def test_error_code_reply(connection, stat):
+    connection.metrics = Metrics()
+    missing = protocol.ExistsRequest(path='/foo', watch=False)
+    missing.error_codes = True
+    existing = protocol.ExistsRequest(path='/bar', watch=False)
+    existing.error_codes = True
+    f1 = connection.send(missing, xid=1)
+    f2 = connection.send(existing, xid=2)
+
+    connection.data_received(
+        reply_frame(1, protocol.DeleteResponse(), error_code=exc.NoNode.error_code)
+        + reply_frame(2, protocol.ExistsResponse(stat=stat))
+    )
+
+    assert f1.result() == (1, exc.NoNode.error_code)
+    assert f2.result() == (1, protocol.ExistsResponse(stat=stat))
+    assert not connection.error_code_xids
+    assert connection.metrics.snapshot()['errors'] == {'Exists': {'NoNode': 1}}
+
+
+@pytest.mark.parametrize('zero_copy', [False, True])
+@pytest.mark.asyncio
+async def test_watch_event_received(connection, zero_copy):
+    connection.zero_copy = zero_copy
+    event = protocol.WatchEvent(type=protocol.WatchEvent.DATA_CHANGED, state=3, path='/föö')
+
+    connection.data_received(reply_frame(protocol.WATCH_XID, event))
+
+    connection.watch_handler.assert_called_once_with(event)
+    assert type(connection.watch_handler.call_args[0][0].path) is str
+
+
+@pytest.mark.parametrize('zero_copy', [False, True])
+@pytest.mark.asyncio
+async def test_children_received(connection, stat, zero_copy):
+    connection.zero_copy = zero_copy
+    f = connection.send(protocol.GetChildren2Request(path='/foo', watch=False), xid=1)
+
+    connection.data_received(reply_frame(1, protocol.GetChildren2Response(children=['bär', 'baz'], stat=stat)))
+
+    _, response = f.result()
+    assert response.children == ['bär', 'baz']
+    assert all(type(child) is str for child in response.children)
+    assert response.stat == stat
+
+
+@pytest.mark.asyncio
+async def test_unfinished_read(connection):
+    connection.read_timeout = 0.05
+    f = connection.send(protocol.DeleteRequest(path='/foo', version=-1), xid=1)
+
+    connection.data_received(reply_frame(1, protocol.DeleteResponse())[:-4])
+    await asyncio.sleep(0.1)
+
+    with pytest.raises(exc.UnfinishedRead):
+        f.result()
+    connection.transport.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_frames_split_across_chunks(connection):
+    futures = [connection.send(protocol.DeleteRequest(path='/foo', version=-1), xid=xid) for xid in (1, 2)]
+    raw = reply_frame(1, protocol.DeleteResponse()) + reply_frame(2, protocol.DeleteResponse())
+
+    for i in range(len(raw)):
+        connection.data_received(raw[i : i + 1])
+
+    assert [f.result() for f in futures] == [(1, protocol.DeleteResponse())] * 2
+    assert not connection.read_buffer
+    assert connection.partial_since is None
+
+
+@pytest.mark.asyncio
+async def test_close_reply(connection):
+    f = connection.send(protocol.CloseRequest())
+    response = protocol.ConnectResponse(protocol_version=0, timeout=0, session_id=0, password=b'')
+
+    connection.data_received(aiozk.connection.size_struct.pack(len(response.encode())) + response.encode())
+
+    assert f.result() == (None, response)
+    assert connection.pending_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_connection_lost_aborts_pending(connection):
+    f = connection.send(protocol.DeleteRequest(path='/foo', version=-1), xid=1)
+
+    connection.connection_lost(None)
+
+    assert connection.closing
+    with pytest.raises(exc.ConnectError):
+        f.result()
+    with pytest.raises(exc.ConnectError):
+        connection.send(protocol.DeleteRequest(path='/foo', version=-1), xid=2).result()
+
+
+@pytest.mark.asyncio
+async def test_connection_lost_during_connect(connection):
+    request = protocol.ConnectRequest(
+        protocol_version=0, last_seen_zxid=0, timeout=0, session_id=0, password=b'\x00', read_only=False
+    )
+    send_connect = asyncio.create_task(connection.send_connect(request))
+    await asyncio.sleep(0)
+
+    connection.connection_lost(ConnectionResetError())
+
+    assert await send_connect is None
+    assert connection.connect_future is None
+
+
+@pytest.mark.asyncio
+async def test_wait_lost(connection):
+    wait_lost = asyncio.create_task(connection.wait_lost())
+    await asyncio.sleep(0)
+    assert not wait_lost.done()
+
+    connection.connection_lost(None)
+
+    await asyncio.wait_for(wait_lost, 1)
+    await asyncio.wait_for(connection.wait_lost(), 1)
+
+
+@pytest.mark.asyncio
+async def test_send_coalesces_writes(connection):
+    for xid in range(1, 4):
+        connection.send(protocol.DeleteRequest(path='/foo', version=-1), xid=xid)
+    connection.transport.writelines.assert_not_called()
+
+    await asyncio.sleep(0)
+
+    connection.transport.writelines.assert_called_once()
+    chunks = connection.transport.writelines.call_args[0][0]
+    payload = protocol.DeleteRequest(path='/foo', version=-1).serialize(1)
+    assert b''.join(chunks[:2]) == aiozk.connection.size_struct.pack(len(payload)) + payload
+    assert len(chunks) == 6
+
+
+@pytest.mark.asyncio
+async def test_last_activity(connection):
+    assert connection.last_sent is None
+    assert connection.last_received is None
+
+    f = connection.send(protocol.DeleteRequest(path='/foo', version=-1), xid=1)
+    connection.flush()
+    connection.data_received(reply_frame(1, protocol.DeleteResponse()))
+
+    now = asyncio.get_running_loop().time()
+    assert connection.last_sent == pytest.approx(now, abs=0.1)
+    assert connection.last_received == pytest.approx(now, abs=0.1)
+    await f
+
+
+@pytest.mark.asyncio
+async def test_metrics(connection):
+    connection.metrics = Metrics()
+    get = connection.send(protocol.GetDataRequest(path='/foo', watch=False), xid=1)
+    delete = connection.send(protocol.DeleteRequest(path='/foo', version=-1), xid=2)
+    exists = connection.send(protocol.ExistsRequest(path='/foo', watch=False), xid=3)
+
+    connection.data_received(
+        reply_frame(2, protocol.DeleteResponse()) + reply_frame(1, protocol.DeleteResponse(), error_code=-101)
+    )
+    connection.abort()
+
+    for f in (get, exists):
+        with pytest.raises((exc.NoNode, exc.ConnectError)):
+            await f
+    await delete
+
+    snapshot = connection.metrics.snapshot()
+    assert snapshot['requests'] == {'GetData': 1, 'Delete': 1, 'Exists': 1}
+    assert snapshot['errors'] == {'GetData': {'NoNode': 1}, 'Exists': {'ConnectError': 1}}
+    assert snapshot['in_flight'] == {'GetData': 0, 'Delete': 0, 'Exists': 0}
+    assert snapshot['latency']['Delete']['count'] == 1
+    assert 'Exists' not in snapshot['latency']
+    assert snapshot['bytes_received'] > 0
+    assert connection.sent_at == {}
+
+
+@pytest.mark.asyncio
+async def test_hooks(connection):
+    enqueued, written, responses = [], [], []
+    connection.hooks.add('on_enqueue', lambda **kwargs: enqueued.append(kwargs))
+    connection.hooks.add('on_write', lambda **kwargs: written.append(kwargs))
+    connection.hooks.add('on_response', lambda **kwargs: responses.append(kwargs))
+
+    delete = protocol.DeleteRequest(path='/foo', version=-1)
+    exists = protocol.ExistsRequest(path='/bar', watch=False)
+    f = connection.send(delete, xid=1)
+    connection.send(exists, xid=2)
+    connection.flush()
+
+    frame = reply_frame(1, protocol.DeleteResponse())
+    connection.data_received(frame)
+    connection.abort()
+    await f
+
+    assert [(e['request'], e['xid'], e['path'], e['pending']) for e in enqueued] == [
+        (delete, 1, '/foo', 0),
+        (exists, 2, '/bar', 1),
+    ]
+    assert written == [{'host': 'zookeeper.test', 'port': 2181, 'size': sum(e['size'] for e in enqueued), 'count': 2}]
+    assert responses[0]['request'] is delete
+    assert responses[0]['opcode'] == protocol.DeleteRequest.opcode
+    assert responses[0]['size'] == len(frame) - aiozk.connection.size_struct.size
+    assert responses[0]['latency'] >= 0
+    assert responses[0]['error'] is None
+    assert responses[1]['request'] is exists
+    assert responses[1]['latency'] is None
+    assert isinstance(responses[1]['error'], exc.ConnectError)
+    assert connection.traced == {}
+
+
+@pytest.mark.asyncio
+async def test_slow_request_log(connection, caplog):
+    connection.host_ip = '10.0.0.1'
+    connection.metrics = Metrics()
+    connection.slow_request_threshold = 0
+    connection.send(protocol.DeleteRequest(path='/foo', version=-1), xid=1)
+    f = connection.send(protocol.DeleteRequest(path='/bar', version=-1), xid=2)
+
+    with caplog.at_level(logging.WARNING, logger='aiozk.connection.slow'):
+        connection.data_received(reply_frame(2, protocol.DeleteResponse()))
+    await f
+
+    [record] = caplog.records
+    message = record.getMessage()
+    assert message.startswith('Slow Delete request for /bar:')
+    assert '1 requests pending at send, server zookeeper.test:2181 (10.0.0.1)' in message
+    assert connection.metrics.snapshot()['slow_requests'] == {'Delete': 1}
+
+
+@pytest.mark.asyncio
+async def test_fast_request_not_logged(connection, caplog):
+    connection.slow_request_threshold = 10
+    f = connection.send(protocol.DeleteRequest(path='/foo', version=-1), xid=1)
+
+    with caplog.at_level(logging.WARNING, logger='aiozk.connection.slow'):
+        connection.data_received(reply_frame(1, protocol.DeleteResponse()))
+    await f
+
+    assert not caplog.records
+    assert connection.traced == {}
+
+
+@pytest.mark.asyncio
+async def test_send_flushes_full_batch(connection):
+    connection.write_batch_bytes = 10
+
+    connection.send(protocol.DeleteRequest(path='/foo', version=-1), xid=1)
+
+    connection.transport.writelines.assert_called_once()
+    assert connection.flush_handle is None
+    assert not connection.write_buffer
+
+
+@pytest.mark.asyncio
+async def test_wait_writable(connection):
+    connection.pause_writing()
+    waiter = asyncio.create_task(connection.wait_writable())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    connection.resume_writing()
+    await waiter
+    await connection.wait_writable()
+
+
+@pytest.mark.asyncio
+async def test_connect_with_known_version_skips_probe(connection):
+    loop = asyncio.get_running_loop()
+    with mock.patch('asyncio.open_connection') as open_connection, mock.patch.object(
+        loop, 'create_connection', mock.AsyncMock()
+    ) as create_connection:
+        await connection.connect(version_info=(3, 6, 3))
+
+    open_connection.assert_not_called()
+    create_connection.assert_awaited_once()
+    assert connection.version_info == (3, 6, 3)
+    assert connection.start_read_only is None
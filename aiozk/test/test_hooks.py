@@ -0,0 +1,43 @@
+from unittest import mock
+
+import pytest
+
+from aiozk.hooks import Hooks
+
+
+def test_fire_calls_callbacks_in_order():
+    hooks = Hooks()
+    calls = []
+    hooks.add('on_state_change', lambda **kwargs: calls.append(('first', kwargs)))
+    hooks.add('on_state_change', lambda **kwargs: calls.append(('second', kwargs)))
+
+    hooks.fire('on_state_change', old='lost', new='connected')
+
+    assert calls == [
+        ('first', {'old': 'lost', 'new': 'connected'}),
+        ('second', {'old': 'lost', 'new': 'connected'}),
+    ]
+
+
+def test_failing_callback_does_not_stop_others():
+    hooks = Hooks()
+    callback = mock.Mock()
+    hooks.add('on_write', mock.Mock(side_effect=RuntimeError))
+    hooks.add('on_write', callback)
+
+    hooks.fire('on_write', host='zk', port=2181, size=10, count=1)
+
+    callback.assert_called_once_with(host='zk', port=2181, size=10, count=1)
+
+
+def test_add_and_remove():
+    hooks = Hooks()
+    callback = mock.Mock()
+    hooks.add('on_retry', callback)
+    assert hooks.on_retry == [callback]
+
+    hooks.remove('on_retry', callback)
+    assert not hooks.on_retry
+
+    with pytest.raises(ValueError, match='Unknown hook'):
+        hooks.add('on_something', callback)
@@ -22,16 +22,14 @@ async def test_creation_failure_deadlock(zk, path):
         await asyncio.sleep(1)
         zk.session.state.transition_to(States.SUSPENDED)
 
-    zk.session.conn.read_loop_task.cancel()
-    zk.session.conn.read_loop_task = None
-    # wait for that read loop task is cancelled
+    zk.session.conn.pause_reading()
     await asyncio.sleep(1)
 
     _ = asyncio.create_task(change_state())  # noqa: RUF006
     lock_acquired = False
     with pytest.raises(TimeoutError):
         # lock is created at zookeeper but response can not be returned because
-        # read loop task was cancelled.
+        # reading from the connection was paused.
         await lock.acquire(timeout=2)
 
     assert not lock_acquired
@@ -0,0 +1,80 @@
+import math
+
+from aiozk import exc, protocol
+from aiozk.metrics import Histogram, Metrics, opcode_name, to_prometheus
+
+
+def test_opcode_name():
+    assert opcode_name(protocol.GetDataRequest.opcode) == 'GetData'
+    assert opcode_name(protocol.TransactionRequest.opcode) == 'Transaction'
+    assert opcode_name(12345) == '12345'
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value)
+
+    assert histogram.snapshot() == {
+        'buckets': [(0.1, 2), (1, 3), (math.inf, 4)],
+        'count': 4,
+        'sum': 3.65,
+    }
+
+
+def test_snapshot():
+    metrics = Metrics()
+    metrics.request_sent(protocol.GetDataRequest.opcode, 20)
+    metrics.request_sent(protocol.GetDataRequest.opcode, 20)
+    metrics.request_sent(protocol.ExistsRequest.opcode, 15)
+    metrics.request_done(protocol.GetDataRequest.opcode, 0.002)
+    metrics.request_done(protocol.GetDataRequest.opcode, 0.004, exc.NoNode)
+    metrics.connections = 3
+
+    snapshot = metrics.snapshot()
+
+    assert snapshot['requests'] == {'GetData': 2, 'Exists': 1}
+    assert snapshot['errors'] == {'GetData': {'NoNode': 1}}
+    assert snapshot['in_flight'] == {'GetData': 0, 'Exists': 1}
+    assert snapshot['latency']['GetData']['count'] == 2
+    assert snapshot['bytes_sent'] == 55
+    assert snapshot['reconnects'] == 2
+
+
+def test_to_prometheus():
+    metrics = Metrics()
+    metrics.request_sent(protocol.GetDataRequest.opcode, 20)
+    metrics.request_done(protocol.GetDataRequest.opcode, 0.002, exc.NoNode)
+    snapshot = metrics.snapshot()
+    snapshot['window'] = {'in_flight': 0, 'queue_depth': 0, 'max_queue_depth': 2, 'queued_total': 5}
+    snapshot['watches'] = {
+        'watches': 3,
+        'callbacks': 4,
+        'persistent_watches': 0,
+        'persistent_callbacks': 0,
+        'server_watches': 2,
+    }
+    snapshot['stat_cache'] = {
+        'size': 7,
+        'max_size': 10,
+        'bytes': 0,
+        'max_bytes': None,
+        'hits': 3,
+        'misses': 1,
+        'evictions': 0,
+    }
+
+    text = to_prometheus(snapshot)
+
+    assert '# TYPE aiozk_requests_total counter\naiozk_requests_total{op="GetData"} 1\n' in text
+    assert 'aiozk_errors_total{op="GetData",error="NoNode"} 1\n' in text
+    assert 'aiozk_request_latency_seconds_bucket{op="GetData",le="0.001"} 0\n' in text
+    assert 'aiozk_request_latency_seconds_bucket{op="GetData",le="0.0025"} 1\n' in text
+    assert 'aiozk_request_latency_seconds_bucket{op="GetData",le="+Inf"} 1\n' in text
+    assert 'aiozk_request_latency_seconds_count{op="GetData"} 1\n' in text
+    assert 'aiozk_sent_bytes_total 20\n' in text
+    assert 'aiozk_window_queued_total 5\n' in text
+    assert 'aiozk_watch_callbacks 4\n' in text
+    assert 'aiozk_server_watches 2\n' in text
+    assert 'aiozk_cache_entries{cache="stat"} 7\n' in text
+    assert 'aiozk_cache_hits_total{cache="stat"} 3\n' in text
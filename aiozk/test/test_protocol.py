@@ -0,0 +1,94 @@
+import struct
+
+import pytest
+
+from aiozk import exc, protocol
+from aiozk.protocol.stat import Stat
+
+
+def rendered(request, xid=None):
+    formats = []
+    data = []
+    if xid is not None:
+        formats.append('i')
+        data.append(xid)
+    if request.opcode:
+        formats.append('i')
+        data.append(request.opcode)
+    payload_format, payload_data = request.render()
+    formats.append(payload_format)
+    data.extend(payload_data)
+    return struct.pack('!' + ''.join(formats), *data)
+
+
+def test_stat_is_compiled_into_single_struct():
+    assert len(Stat.compiled_parts) == 1
+    fixed, names, codec = Stat.compiled_parts[0]
+    assert fixed
+    assert names == tuple(name for name, _ in Stat.parts)
+    assert codec.size == 68
+
+
+@pytest.mark.parametrize(
+    'request_',
+    [
+        protocol.GetDataRequest(path='/foo/bär', watch=True),
+        protocol.SetDataRequest(path='/foo', data=b'data', version=3),
+        protocol.SetDataRequest(path='/foo', data=None, version=-1),
+        protocol.CreateRequest(path='/foo', data='bar', acl=[protocol.UNRESTRICTED_ACCESS], flags=2),
+        protocol.SetWatchesRequest(relative_zxid=5, data_watches=['/a', '/b'], exist_watches=[], child_watches=['/c']),
+        protocol.PingRequest(),
+    ],
+)
+def test_serialize_matches_render(request_):
+    assert request_.serialize() == rendered(request_)
+    assert request_.serialize(xid=7) == rendered(request_, xid=7)
+
+
+def test_response_roundtrip(stat):
+    raw = protocol.GetACLResponse(acl=[protocol.WORLD_READABLE], stat=stat).encode()
+    response = protocol.GetACLResponse.deserialize(raw)
+
+    assert response.acl == [protocol.WORLD_READABLE]
+    assert response.stat == stat
+
+
+def test_parse_truncated_buffer(stat):
+    raw = protocol.GetDataResponse(data=b'data', stat=stat).encode()
+
+    with pytest.raises(exc.UnfinishedRead):
+        protocol.GetDataResponse.deserialize(raw[:6])
+
+
+@pytest.mark.parametrize(('trailer', 'read_only'), [(b'', None), (b'\x00', False), (b'\x01', True)])
+def test_connect_response_read_only(trailer, read_only):
+    response = protocol.ConnectResponse(protocol_version=0, timeout=10000, session_id=1, password=b'secret')
+
+    parsed = protocol.ConnectResponse.deserialize(response.encode() + trailer)
+
+    assert parsed == response
+    assert parsed.read_only is read_only
+
+
+def test_multi_read_roundtrip(stat):
+    request = protocol.MultiReadRequest()
+    request.add(protocol.GetDataRequest(path='/foo', watch=False))
+    request.add(protocol.GetChildrenRequest(path='/bar', watch=True))
+    assert request.serialize(1)[4:8] == struct.pack('!i', 22)
+
+    header = protocol.transaction.MultiHeader
+    payload = b''.join(
+        [
+            header(type=protocol.GetDataRequest.opcode, done=False, error=0).encode(),
+            protocol.GetDataResponse(data=b'data', stat=stat).encode(),
+            header(type=-1, done=False, error=exc.NoNode.error_code).encode(),
+            struct.pack('!i', exc.NoNode.error_code),
+            header(type=-1, done=True, error=-1).encode(),
+        ]
+    )
+
+    response = protocol.response_xref[22].deserialize(payload)
+
+    assert isinstance(response, protocol.MultiReadResponse)
+    assert response.responses[0].data == b'data'
+    assert isinstance(response.responses[1], exc.NoNode)
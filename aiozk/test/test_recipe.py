@@ -1,6 +1,9 @@
+from unittest import mock
+
 import pytest
 
 from aiozk.exc import NodeExists, TimeoutError
+from aiozk.recipes.data_watcher import DataWatcher
 from aiozk.recipes.sequential import SequentialRecipe
 
 
@@ -87,3 +90,17 @@ async def test_prohibited_slash_in_label(zk, path):
 
     with pytest.raises(ValueError, match='slash'):
         await seq_recipe.create_unique_znode('test/test')
+
+
+@pytest.mark.asyncio
+async def test_data_watcher_zero_copy(path):
+    client = mock.MagicMock()
+    client.exists = mock.AsyncMock(return_value=True)
+    client.get_data = mock.AsyncMock(return_value=memoryview(b'data'))
+    watcher = DataWatcher()
+    watcher.set_client(client)
+
+    data = await watcher.fetch(path)
+
+    assert type(data) is bytes
+    assert data == b'data'
@@ -5,6 +5,7 @@ import pytest
 
 import aiozk.session
 from aiozk import exc, protocol
+from aiozk.metrics import Metrics
 from aiozk.states import States
 
 
@@ -21,6 +22,7 @@ def session():
     session.state.transition_to(aiozk.session.States.CONNECTED)
     session.conn = mock.MagicMock()
     session.conn.send = mock.AsyncMock()
+    session.conn.wait_writable = mock.AsyncMock()
     session.conn.close = mock.AsyncMock()
     session.ensure_safe_state = mock.AsyncMock()
     session.set_heartbeat = mock.Mock()
@@ -145,7 +147,98 @@ async def test_send_connection_error(session):
 
     session.retry_policy.clear.assert_called_once_with(req)
     assert session.conn.send.call_count == 2
-    session.set_heartbeat.assert_called_once_with()
+    session.set_heartbeat.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_send_retry_hook(session):
+    retries = []
+    session.hooks.add('on_retry', lambda **kwargs: retries.append(kwargs))
+    error = exc.ConnectError('zookeeper.test', '2181')
+    session.conn.send.side_effect = [error, (1, mock.MagicMock())]
+    req = protocol.ExistsRequest(path='/foo', watch=False)
+
+    await session.send(req)
+
+    assert retries == [{'request': req, 'opcode': req.opcode, 'path': '/foo', 'error': error}]
+
+
+@pytest.mark.asyncio
+async def test_send_coalesces_identical_reads(session):
+    session.metrics = Metrics()
+    reply = asyncio.get_running_loop().create_future()
+    response = mock.MagicMock()
+
+    async def send(request, xid):
+        return await reply
+
+    session.conn.send = mock.Mock(side_effect=send)
+    sends = [
+        asyncio.create_task(session.send(protocol.GetDataRequest(path='/a', watch=False))),
+        asyncio.create_task(session.send(protocol.GetDataRequest(path='/a', watch=False))),
+        asyncio.create_task(session.send(protocol.GetDataRequest(path='/a', watch=True))),
+    ]
+    await asyncio.sleep(0)
+    reply.set_result((1, response))
+
+    assert await asyncio.gather(*sends) == [response] * 3
+    assert session.conn.send.call_count == 2
+    assert session.metrics.coalesced == {protocol.GetDataRequest.opcode: 1}
+    assert not session.reads_in_flight
+
+
+@pytest.mark.asyncio
+async def test_send_coalesced_read_survives_cancellation(session):
+    loop = asyncio.get_running_loop()
+    replies = []
+    response = mock.MagicMock()
+
+    async def send(request, xid):
+        replies.append(loop.create_future())
+        return await replies[-1]
+
+    session.conn.send = mock.Mock(side_effect=send)
+    first = asyncio.create_task(session.send(protocol.ExistsRequest(path='/a', watch=True)))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(session.send(protocol.ExistsRequest(path='/a', watch=True)))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    while len(replies) < 2:  # noqa: ASYNC110
+        await asyncio.sleep(0)
+    replies[-1].set_result((1, response))
+
+    assert await second is response
+    assert first.cancelled()
+    assert session.conn.send.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_send_coalesced_read_shares_error(session):
+    reply = asyncio.get_running_loop().create_future()
+
+    async def send(request, xid):
+        return await reply
+
+    session.conn.send = mock.Mock(side_effect=send)
+    sends = [asyncio.create_task(session.send(protocol.ExistsRequest(path='/a', watch=False))) for _ in range(2)]
+    await asyncio.sleep(0)
+    reply.set_exception(exc.NoNode())
+
+    results = await asyncio.gather(*sends, return_exceptions=True)
+    assert all(isinstance(result, exc.NoNode) for result in results)
+    session.conn.send.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_state_change_hook(session):
+    changes = []
+    session.hooks.add('on_state_change', lambda **kwargs: changes.append((kwargs['old'], kwargs['new'])))
+
+    session.state.transition_to(States.SUSPENDED)
+    session.state.transition_to(States.CONNECTED)
+
+    assert changes == [(States.CONNECTED, States.SUSPENDED), (States.SUSPENDED, States.CONNECTED)]
 
 
 @pytest.mark.asyncio
@@ -170,7 +263,7 @@ async def test_send_good_case(session):
 
     session.retry_policy.clear.assert_called_once_with(req)
     session.conn.send.assert_called_once()
-    session.set_heartbeat.assert_called_once_with()
+    session.set_heartbeat.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -195,17 +288,17 @@ async def test_duplicated_heartbeat_task(servers):
     session.set_heartbeat()
 
     # Simulate that response is delayed
-    session.conn.read_loop_task.cancel()
+    session.conn.pause_reading()
     # Ensure that the first heartbeat task is running and waiting for a
     # response of ping request.
     await asyncio.sleep(session.timeout / aiozk.session.HEARTBEAT_FREQUENCY + 0.1)
     # While the first heartbeat task is waiting for a response,
-    # .set_heartbeat() can be called by session.send().
+    # .set_heartbeat() can be called again.
     session.set_heartbeat()
     # Ensure that the second heartbeat task is running and waiting for a
     # response of ping request.
     await asyncio.sleep(session.timeout / aiozk.session.HEARTBEAT_FREQUENCY + 0.1)
-    session.conn.start_read_loop()
+    session.conn.resume_reading()
     # If the second call of .set_heartbeat() created a duplicated heartbeat
     # task and the state of session turns into SUSPENDED. The right behavior is
     # that the second call of .set_heartbeat does not create a duplicated
@@ -221,6 +314,50 @@ async def test_duplicated_heartbeat_task(servers):
         await session.close()
 
 
+@pytest.mark.asyncio
+async def test_check_heartbeat_idle(session):
+    session.create_heartbeat = mock.Mock()
+    session.conn.last_sent = session.conn.last_received = None
+
+    session.check_heartbeat()
+
+    session.create_heartbeat.assert_called_once_with()
+    assert session.heartbeat_handle.when() == pytest.approx(
+        asyncio.get_running_loop().time() + session.timeout / aiozk.session.HEARTBEAT_FREQUENCY, abs=0.1
+    )
+    session.heartbeat_handle.cancel()
+
+
+@pytest.mark.asyncio
+async def test_check_heartbeat_recent_activity(session):
+    session.create_heartbeat = mock.Mock()
+    now = asyncio.get_running_loop().time()
+    session.conn.last_sent = now - 1
+    session.conn.last_received = now - 2
+
+    session.check_heartbeat()
+
+    session.create_heartbeat.assert_not_called()
+    # checked again once the older of the two timestamps is an interval old
+    assert session.heartbeat_handle.when() == pytest.approx(
+        now - 2 + session.timeout / aiozk.session.HEARTBEAT_FREQUENCY, abs=0.1
+    )
+    session.heartbeat_handle.cancel()
+
+
+@pytest.mark.asyncio
+async def test_check_heartbeat_nothing_received(session):
+    session.create_heartbeat = mock.Mock()
+    now = asyncio.get_running_loop().time()
+    session.conn.last_sent = now
+    session.conn.last_received = now - session.timeout
+
+    session.check_heartbeat()
+
+    session.create_heartbeat.assert_called_once_with()
+    session.heartbeat_handle.cancel()
+
+
 @pytest.mark.asyncio
 async def test_session_close_heartbeat_cancellation(servers):
     session = aiozk.session.Session(servers, 3, None, False, None)
@@ -250,7 +387,7 @@ async def test_send_timeout(servers, path):
     await session.start()
     await session.state.wait_for(States.CONNECTED)
     # Simulate that response is delayed
-    session.conn.read_loop_task.cancel()
+    session.conn.pause_reading()
 
     await asyncio.sleep(0.1)
 
@@ -259,7 +396,7 @@ async def test_send_timeout(servers, path):
         await asyncio.wait_for(session.send(protocol.ExistsRequest(path=nonode_path, watch=False)), timeout=0.1)
 
     await asyncio.sleep(0.1)
-    session.conn.start_read_loop()
+    session.conn.resume_reading()
     try:
         with pytest.raises(exc.NoNode):
             await asyncio.wait_for(
@@ -289,3 +426,263 @@ async def test_find_server(session, retry_policy):
 
     conn.start_read_only = False
     await session.find_server(allow_read_only=False)
+
+
+def make_racing_connections(session, delays):
+    conns = {}
+
+    async def make_connection(host, port):
+        if delays[host]:
+            await asyncio.sleep(delays[host])
+        conn = conns[host] = mock.MagicMock()
+        conn.close = mock.AsyncMock()
+        conn.start_read_only = False
+        return conn
+
+    session.hosts = [(host, 2181) for host in delays]
+    session.make_connection = mock.AsyncMock(side_effect=make_connection)
+    return conns
+
+
+@pytest.mark.asyncio
+async def test_find_server_race_fastest_wins(session, retry_policy):
+    old_conn = session.conn
+    session.connect_race_delay = 0.01
+    conns = make_racing_connections(session, {'slow': 1, 'fast': 0})
+
+    with mock.patch('aiozk.session.random.sample', side_effect=lambda hosts, n: list(hosts)):
+        await asyncio.wait_for(session.find_server(allow_read_only=False), 0.5)
+
+    assert session.conn is conns['fast']
+    assert 'slow' not in conns, 'slow attempt should be cancelled'
+    await asyncio.sleep(0)
+    old_conn.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_find_server_race_starts_next_on_failure(session, retry_policy):
+    session.connect_race_delay = 10
+    conns = make_racing_connections(session, {'down': 0, 'up': 0})
+    make_connection = session.make_connection.side_effect
+
+    async def fail_down(host, port):
+        if host == 'down':
+            return None
+        return await make_connection(host, port)
+
+    session.make_connection.side_effect = fail_down
+
+    with mock.patch('aiozk.session.random.sample', side_effect=lambda hosts, n: list(hosts)):
+        await asyncio.wait_for(session.find_server(allow_read_only=False), 0.5)
+
+    assert session.conn is conns['up']
+
+
+@pytest.mark.asyncio
+async def test_find_server_race_closes_extra_connections(session, retry_policy):
+    session.connect_race_delay = 0
+    conns = make_racing_connections(session, {'a': 0, 'b': 0})
+    make_connection = session.make_connection.side_effect
+    both_started = asyncio.Event()
+
+    async def connect_together(host, port):
+        if session.make_connection.await_count == 2:
+            both_started.set()
+        await both_started.wait()
+        return await make_connection(host, port)
+
+    session.make_connection.side_effect = connect_together
+
+    with mock.patch('aiozk.session.random.sample', side_effect=lambda hosts, n: list(hosts)):
+        await session.find_server(allow_read_only=False)
+    await asyncio.sleep(0)
+
+    assert len(conns) == 2
+    loser = conns['a'] if session.conn is conns['b'] else conns['b']
+    loser.close.assert_awaited_once()
+    session.conn.close.assert_not_awaited()
+
+
+def make_standby_connection(host, port):
+    conn = mock.MagicMock()
+    conn.host, conn.port = host, int(port)
+    conn.closing = False
+    conn.start_read_only = False
+    conn.close = mock.AsyncMock()
+    conn.lost = asyncio.get_running_loop().create_future()
+
+    async def wait_lost():
+        await asyncio.shield(conn.lost)
+
+    conn.wait_lost = wait_lost
+    return conn
+
+
+@pytest.mark.asyncio
+async def test_standby_used_by_find_server(session, retry_policy):
+    session.hosts = [('zk1', '2181'), ('zk2', '2181')]
+    session.conn.host, session.conn.port = 'zk1', 2181
+    session.standby = True
+    session.make_connection = mock.AsyncMock(side_effect=make_standby_connection)
+
+    session.start_standby()
+    await asyncio.sleep(0.01)
+
+    standby_conn = session.standby_conn
+    session.make_connection.assert_awaited_once_with('zk2', '2181')
+
+    await session.find_server(allow_read_only=False)
+
+    assert session.conn is standby_conn
+    assert session.standby_conn is None
+    session.make_connection.assert_awaited_once()
+    standby_conn.close.assert_not_awaited()
+    await asyncio.sleep(0)
+    assert session.standby_task is None
+
+
+@pytest.mark.asyncio
+async def test_standby_reopened_when_lost(session, retry_policy):
+    session.hosts = [('zk1', '2181'), ('zk2', '2181')]
+    session.conn.host, session.conn.port = 'zk1', 2181
+    session.standby = True
+    session.make_connection = mock.AsyncMock(side_effect=make_standby_connection)
+
+    session.start_standby()
+    await asyncio.sleep(0.01)
+    first = session.standby_conn
+    first.lost.set_result(None)
+    await asyncio.sleep(0.01)
+
+    assert session.standby_conn is not first
+    assert session.make_connection.await_count == 2
+    first.close.assert_awaited_once()
+
+    await session.stop_standby()
+    assert session.standby_conn is None
+
+
+@pytest.mark.asyncio
+async def test_persistent_watch_dispatch(session):
+    persistent, recursive, other = mock.Mock(), mock.Mock(), mock.Mock()
+    session.add_persistent_watch(protocol.AddWatchRequest.PERSISTENT, '/a/b', persistent)
+    session.add_persistent_watch(protocol.AddWatchRequest.PERSISTENT_RECURSIVE, '/a', recursive)
+    session.add_persistent_watch(protocol.AddWatchRequest.PERSISTENT_RECURSIVE, '/ab', other)
+
+    for event_path in ('/a/b', '/a/b/c'):
+        session.event_dispatch(protocol.WatchEvent(type=protocol.WatchEvent.DATA_CHANGED, state=3, path=event_path))
+    await asyncio.sleep(0)
+
+    assert [c.args[0].path for c in persistent.call_args_list] == ['/a/b']
+    assert [c.args[0].path for c in recursive.call_args_list] == ['/a/b', '/a/b/c']
+    other.assert_not_called()
+
+    assert not session.remove_persistent_watch(protocol.AddWatchRequest.PERSISTENT_RECURSIVE, '/a', mock.Mock())
+    assert session.remove_persistent_watch(protocol.AddWatchRequest.PERSISTENT_RECURSIVE, '/a', recursive)
+    assert (protocol.AddWatchRequest.PERSISTENT_RECURSIVE, '/a') not in session.watches.persistent
+
+
+@pytest.mark.asyncio
+async def test_restore_watches_with_persistent_watches(session):
+    session.conn.send = mock.Mock(return_value=asyncio.get_running_loop().create_future())
+    session.add_watch_callback(protocol.WatchEvent.DATA_CHANGED, '/data', mock.Mock())
+    session.add_persistent_watch(protocol.AddWatchRequest.PERSISTENT, '/p', mock.Mock())
+    session.add_persistent_watch(protocol.AddWatchRequest.PERSISTENT_RECURSIVE, '/r', mock.Mock())
+
+    session.restore_watches()
+
+    [request] = session.conn.send.call_args.args
+    assert isinstance(request, protocol.SetWatches2Request)
+    assert request.data_watches == ['/data']
+    assert request.persistent_watches == ['/p']
+    assert request.persistent_recursive_watches == ['/r']
+
+
+@pytest.mark.asyncio
+async def test_restore_watches_in_chunks(session):
+    loop = asyncio.get_running_loop()
+    futures = []
+
+    def send(request, xid):
+        futures.append(loop.create_future())
+        return futures[-1]
+
+    session.conn.send = mock.Mock(side_effect=send)
+    session.metrics = Metrics()
+    for i in range(5000):
+        session.add_watch_callback(protocol.WatchEvent.CHILDREN_CHANGED, f'/{i:060}', mock.Mock())
+
+    restoring = session.restore_watches()
+
+    requests = [c.args[0] for c in session.conn.send.call_args_list]
+    assert len(requests) == 3
+    assert all(isinstance(request, protocol.SetWatchesRequest) for request in requests)
+    assert all(len(request.serialize()) < 132 * 1024 for request in requests)
+    assert sum(len(request.child_watches) for request in requests) == 5000
+    assert session.metrics.watch_restore_pending == 3
+
+    for f in futures:
+        f.set_result((1, protocol.SetWatchesResponse()))
+    await session.wait_watches_restored(restoring)
+    assert session.metrics.watch_restore_pending == 0
+    assert session.metrics.watches_restored == 5000
+
+
+@pytest.mark.asyncio
+async def test_make_connection_probes_once_per_host(session):
+    with mock.patch('aiozk.session.Connection') as connection_class:
+        conn = connection_class.return_value
+        conn.connect = mock.AsyncMock()
+        conn.version_info = (3, 6, 3)
+
+        await session.make_connection('zookeeper.test', 2181)
+        await session.make_connection('zookeeper.test', 2181)
+
+    assert conn.connect.await_args_list == [mock.call(version_info=None), mock.call(version_info=(3, 6, 3))]
+
+
+@pytest.mark.asyncio
+async def test_make_connection_configured_version(session):
+    session.server_version = (3, 5, 1)
+    with mock.patch('aiozk.session.Connection') as connection_class:
+        conn = connection_class.return_value
+        conn.connect = mock.AsyncMock()
+
+        await session.make_connection('zookeeper.test', 2181)
+
+    conn.connect.assert_awaited_once_with(version_info=(3, 5, 1))
+
+
+@pytest.mark.asyncio
+async def test_last_watch_callback_removes_server_watch(session):
+    session.conn.closing = False
+    session.conn.version_info = (3, 6, 3)
+    session.conn.send = mock.Mock(return_value=asyncio.get_running_loop().create_future())
+    first, second = mock.Mock(), mock.Mock()
+    session.add_watch_callback(protocol.WatchEvent.DATA_CHANGED, '/a', first)
+    session.add_watch_callback(protocol.WatchEvent.DATA_CHANGED, '/a', second)
+    session.watches.track(protocol.ExistsRequest(path='/a', watch=True))
+
+    session.remove_watch_callback(protocol.WatchEvent.DATA_CHANGED, '/a', first)
+    session.conn.send.assert_not_called()
+
+    session.remove_watch_callback(protocol.WatchEvent.DATA_CHANGED, '/a', second)
+    [request] = session.conn.send.call_args.args
+    assert isinstance(request, protocol.RemoveWatchesRequest)
+    assert (request.path, request.type) == ('/a', protocol.RemoveWatchesRequest.DATA)
+    assert not session.watches.server_watches
+
+
+@pytest.mark.asyncio
+async def test_server_watch_not_removed_when_unsupported(session):
+    session.conn.closing = False
+    session.conn.version_info = (3, 4, 14)
+    session.conn.send = mock.Mock()
+    callback = mock.Mock()
+    session.add_watch_callback(protocol.WatchEvent.DATA_CHANGED, '/a', callback)
+    session.watches.track(protocol.ExistsRequest(path='/a', watch=True))
+
+    session.remove_watch_callback(protocol.WatchEvent.DATA_CHANGED, '/a', callback)
+
+    session.conn.send.assert_not_called()
+    assert not session.watches.callbacks
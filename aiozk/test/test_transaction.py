@@ -1,6 +1,8 @@
 import pytest
 
-from aiozk.transaction import Transaction, TransactionFailed
+from aiozk import exc
+from aiozk.features import Features
+from aiozk.transaction import ReadTransaction, Transaction, TransactionFailed
 
 
 pytestmark = pytest.mark.asyncio
@@ -44,3 +46,41 @@ async def test_exception_handling(zk, path):
         async with Transaction(zk) as t:
             t.create(path)
             raise ValueError('aaaa')
+
+
+async def test_read_transaction(zk, path):
+    await zk.create(path, data=b'parent')
+    await zk.create(f'{path}/child')
+
+    t = ReadTransaction(zk)
+    t.get(path)
+    t.get_children(path)
+    t.get(f'{path}/missing')
+    try:
+        (data, stat), children, missing = await t.commit()
+    finally:
+        await zk.deleteall(path)
+
+    assert data == b'parent'
+    assert stat.num_children == 1
+    assert children == ['child']
+    assert isinstance(missing, exc.NoNode)
+
+
+async def test_multi_read(zk, path):
+    await zk.create(path, data=b'parent')
+    try:
+        [(data, _)] = await zk.multi_read([path])
+    finally:
+        await zk.delete(path)
+
+    assert data == b'parent'
+    assert await zk.multi_read([]) == []
+
+
+async def test_read_transaction_unsupported(zk, path, monkeypatch):
+    monkeypatch.setattr(type(zk), 'features', Features((3, 5, 9)))
+    t = zk.begin_read_transaction()
+    t.get(path)
+    with pytest.raises(ValueError, match='feature unavailable'):
+        await t.commit()
@@ -4,8 +4,8 @@ import uuid
 
 import pytest
 
-from .. import WatchEvent
-from ..exc import NoNode
+from .. import WatchEvent, protocol
+from ..exc import NoNode, NoWatcher
 from ..recipes.data_watcher import DataWatcher
 
 
@@ -228,6 +228,85 @@ async def test_watcher_without_parents(zk, path, child1):
     await zk.delete(path)
 
 
+async def wait_for_events(events, count):
+    while len(events) < count:  # noqa: ASYNC110
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_persistent_watch(zk, path):
+    events = []
+
+    def callback(event_type, event_path):
+        events.append((event_type, event_path))
+
+    await zk.add_watch(path, callback)
+    try:
+        await zk.create(path)
+        await zk.set_data(path, b'1')
+        await zk.create(f'{path}/child')
+        await zk.delete(f'{path}/child')
+        await zk.delete(path)
+        await asyncio.wait_for(wait_for_events(events, 5), 1)
+    finally:
+        zk.remove_watch(path, callback)
+
+    assert events == [
+        (WatchEvent.CREATED, path),
+        (WatchEvent.DATA_CHANGED, path),
+        (WatchEvent.CHILDREN_CHANGED, path),
+        (WatchEvent.CHILDREN_CHANGED, path),
+        (WatchEvent.DELETED, path),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_persistent_recursive_watch(zk, path, zk_disruptor):
+    events = []
+
+    def callback(event_type, event_path):
+        events.append((event_type, event_path))
+
+    await zk.create(path)
+    await zk.add_watch(path, callback, recursive=True)
+    try:
+        await zk.create(f'{path}/a')
+        await zk.create(f'{path}/a/b')
+        await asyncio.wait_for(wait_for_events(events, 2), 1)
+
+        # restored with SetWatches2 after reconnecting
+        await zk_disruptor()
+        await zk.set_data(f'{path}/a/b', b'1')
+        await asyncio.wait_for(wait_for_events(events, 3), 1)
+    finally:
+        zk.remove_watch(path, callback, recursive=True)
+        await zk.deleteall(path)
+
+    assert events[:3] == [
+        (WatchEvent.CREATED, f'{path}/a'),
+        (WatchEvent.CREATED, f'{path}/a/b'),
+        (WatchEvent.DATA_CHANGED, f'{path}/a/b'),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_wait_for_events_timeout_removes_watch(zk, path):
+    await zk.create(path)
+    try:
+        f = zk.wait_for_events([WatchEvent.DATA_CHANGED, WatchEvent.DELETED], path)
+        await zk.exists(path, watch=True)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(f, 0.05)
+
+        assert not zk.session.watches.callbacks
+        assert not zk.session.watches.server_watches
+        request = protocol.CheckWatchesRequest(path=zk.normalize_path(path), type=protocol.RemoveWatchesRequest.DATA)
+        with pytest.raises(NoWatcher):
+            await zk.send(request)
+    finally:
+        await zk.delete(path)
+
+
 @pytest.mark.asyncio
 async def test_multi_watcher(zk, path):
     num = 1000
@@ -0,0 +1,117 @@
+from aiozk import protocol
+from aiozk.protocol import AddWatchRequest, RemoveWatchesRequest, WatchEvent
+from aiozk.watches import WatchRegistry, split_watches
+
+
+def event(event_type, path):
+    return WatchEvent(type=event_type, state=3, path=path)
+
+
+def test_unwatched_event_creates_no_entries():
+    registry = WatchRegistry()
+
+    assert list(registry.event_callbacks(event(WatchEvent.DATA_CHANGED, '/a'))) == []
+    assert list(registry.persistent_callbacks(event(WatchEvent.DATA_CHANGED, '/a'))) == []
+    assert not registry.callbacks
+    assert not registry.persistent
+
+
+def test_last_callback_orphans_server_watch():
+    registry = WatchRegistry()
+    first, second = object(), object()
+    registry.add_callback(WatchEvent.DATA_CHANGED, '/a', first)
+    registry.add_callback(WatchEvent.DELETED, '/a', second)
+    registry.track(protocol.GetDataRequest(path='/a', watch=True))
+
+    assert registry.remove_callback(WatchEvent.DATA_CHANGED, '/a', first) == []
+    assert registry.remove_callback(WatchEvent.DELETED, '/a', second) == [RemoveWatchesRequest.DATA]
+    assert registry.stats() == {
+        'watches': 0,
+        'callbacks': 0,
+        'persistent_watches': 0,
+        'persistent_callbacks': 0,
+        'server_watches': 0,
+    }
+
+
+def test_triggered_watch_is_not_orphaned():
+    registry = WatchRegistry()
+    callback = object()
+    registry.add_callback(WatchEvent.CHILDREN_CHANGED, '/a', callback)
+    registry.track(protocol.GetChildren2Request(path='/a', watch=True))
+    registry.track(protocol.GetChildrenRequest(path='/b', watch=False))
+    assert registry.server_watches == {(RemoveWatchesRequest.CHILDREN, '/a')}
+
+    assert list(registry.event_callbacks(event(WatchEvent.CHILDREN_CHANGED, '/a'))) == [callback]
+
+    assert registry.remove_callback(WatchEvent.CHILDREN_CHANGED, '/a', callback) == []
+
+
+def test_track_multi_read():
+    registry = WatchRegistry()
+    request = protocol.MultiReadRequest()
+    request.add(protocol.GetDataRequest(path='/a', watch=True))
+    request.add(protocol.GetChildrenRequest(path='/b', watch=True))
+    request.add(protocol.GetDataRequest(path='/c', watch=False))
+
+    registry.track(request)
+
+    assert registry.server_watches == {(RemoveWatchesRequest.DATA, '/a'), (RemoveWatchesRequest.CHILDREN, '/b')}
+
+
+def test_restore():
+    registry = WatchRegistry()
+    registry.add_callback(WatchEvent.CREATED, '/created', object())
+    registry.add_callback(WatchEvent.DATA_CHANGED, '/data', object())
+    registry.add_callback(WatchEvent.DELETED, '/data', object())
+    registry.add_callback(WatchEvent.CHILDREN_CHANGED, '/children', object())
+    registry.add_persistent(AddWatchRequest.PERSISTENT_RECURSIVE, '/tree', object())
+    registry.track(protocol.ExistsRequest(path='/gone', watch=True))
+
+    assert registry.restore() == {
+        'data_watches': ['/data'],
+        'exist_watches': ['/created'],
+        'child_watches': ['/children'],
+        'persistent_watches': [],
+        'persistent_recursive_watches': ['/tree'],
+    }
+    assert registry.server_watches == {
+        (RemoveWatchesRequest.DATA, '/data'),
+        (RemoveWatchesRequest.DATA, '/created'),
+        (RemoveWatchesRequest.CHILDREN, '/children'),
+    }
+
+
+def test_split_watches():
+    watches = {
+        'data_watches': ['/a' * 10, '/b' * 10],
+        'child_watches': ['/c' * 10],
+        'persistent_watches': ['/' + 'd' * 100],
+    }
+
+    batches = list(split_watches(watches, max_bytes=50))
+
+    assert batches == [
+        {
+            'data_watches': ['/a' * 10, '/b' * 10],
+            'exist_watches': [],
+            'child_watches': [],
+            'persistent_watches': [],
+            'persistent_recursive_watches': [],
+        },
+        {
+            'data_watches': [],
+            'exist_watches': [],
+            'child_watches': ['/c' * 10],
+            'persistent_watches': [],
+            'persistent_recursive_watches': [],
+        },
+        {
+            'data_watches': [],
+            'exist_watches': [],
+            'child_watches': [],
+            'persistent_watches': ['/' + 'd' * 100],
+            'persistent_recursive_watches': [],
+        },
+    ]
+    assert list(split_watches({'data_watches': []})) == []
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from aiozk.window import RequestWindow
+
+
+@pytest.mark.asyncio
+async def test_unbounded_window():
+    window = RequestWindow()
+    for _ in range(100):
+        await window.acquire()
+
+    assert window.in_flight == 100
+    assert window.queued_total == 0
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_let_in_fifo():
+    window = RequestWindow(max_in_flight=1)
+    order = []
+
+    async def request(name):
+        async with window:
+            order.append(name)
+            await asyncio.sleep(0)
+
+    await window.acquire()
+    tasks = [asyncio.create_task(request(name)) for name in 'abc']
+    await asyncio.sleep(0)
+    assert window.queue_depth == 3
+
+    window.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ['a', 'b', 'c']
+    assert window.stats() == {
+        'max_in_flight': 1,
+        'in_flight': 0,
+        'queue_depth': 0,
+        'max_queue_depth': 3,
+        'queued_total': 3,
+    }
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_up_its_place():
+    window = RequestWindow(max_in_flight=1)
+    await window.acquire()
+
+    cancelled = asyncio.create_task(window.acquire())
+    waiting = asyncio.create_task(window.acquire())
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    assert window.queue_depth == 1
+
+    window.release()
+    await waiting
+    assert window.in_flight == 1
@@ -135,6 +135,79 @@ class Transaction:
             raise TransactionFailed
 
 
+class ReadTransaction:
+    """
+    Builder of a batch of reads sent in a single request.
+
+    Unlike a `Transaction` the reads are not atomic, each one succeeds or
+    fails on its own.  Requires Zookeeper 3.6.0 or later.
+    """
+
+    def __init__(self, client):
+        """
+        :param client: Client instance
+        :type client:  aiozk.ZKClient
+        """
+        self.client = client
+        self.request = protocol.MultiReadRequest()
+
+    def get(self, path, watch=False):
+        """
+        Get data and stat of znode
+
+        :param str path: Znode path
+        :param bool watch: Set a data watch on the znode
+
+        :return: None
+        """
+        path = self.client.normalize_path(path)
+
+        self.request.add(protocol.GetDataRequest(path=path, watch=watch))
+
+    def get_children(self, path, watch=False):
+        """
+        Get children names of znode
+
+        :param str path: Znode path
+        :param bool watch: Set a child watch on the znode
+
+        :return: None
+        """
+        path = self.client.normalize_path(path)
+
+        self.request.add(protocol.GetChildrenRequest(path=path, watch=watch))
+
+    async def commit(self):
+        """
+        Send all reads in one request and return their results
+
+        :return: Results in the order the reads were added: ``(data, stat)``
+            for `get()`, children names for `get_children()`, or the
+            exception a read failed with, e.g. ``aiozk.exc.NoNode``
+        :rtype: list
+
+        :raises ValueError: On no reads to commit, or when the *multi_read*
+            feature is not supported by Zookeeper server (< 3.6.0)
+        """
+        if not self.request.requests:
+            raise ValueError('No operations to commit.')
+        if not self.client.features.multi_read:
+            raise ValueError('Cannot multi read, feature unavailable.')
+
+        response = await self.client.send(self.request)
+
+        results = []
+        for reply in response.responses:
+            if isinstance(reply, protocol.GetDataResponse):
+                results.append((reply.data, reply.stat))
+            elif isinstance(reply, protocol.GetChildrenResponse):
+                results.append(reply.children)
+            else:
+                results.append(reply)
+
+        return results
+
+
 class Result:
     """
     Transaction result aggregator
@@ -0,0 +1,219 @@
+import collections
+
+from aiozk import protocol
+
+
+WatchEvent = protocol.WatchEvent
+RemoveWatchesRequest = protocol.RemoveWatchesRequest
+
+# the event types each kind of server-side watch triggers on
+EVENT_TYPES = {
+    RemoveWatchesRequest.DATA: (WatchEvent.CREATED, WatchEvent.DELETED, WatchEvent.DATA_CHANGED),
+    RemoveWatchesRequest.CHILDREN: (WatchEvent.CHILDREN_CHANGED, WatchEvent.DELETED),
+}
+WATCHED_EVENT_TYPES = (WatchEvent.CREATED, WatchEvent.DELETED, WatchEvent.DATA_CHANGED, WatchEvent.CHILDREN_CHANGED)
+
+PERSISTENT_MODES = (protocol.AddWatchRequest.PERSISTENT, protocol.AddWatchRequest.PERSISTENT_RECURSIVE)
+
+# upper bound of the watched paths sent in one SetWatches request, the
+# same as the Java client uses, well below the default 1MB packet limit
+SET_WATCHES_MAX_BYTES = 128 * 1024
+
+WATCH_KINDS = ('data_watches', 'exist_watches', 'child_watches', 'persistent_watches', 'persistent_recursive_watches')
+
+
+def split_watches(watches, max_bytes=SET_WATCHES_MAX_BYTES):
+    """
+    Splits the watches returned by `WatchRegistry.restore()` into batches
+    of paths taking up at most ``max_bytes`` each, a path longer than that
+    gets a batch of its own.
+    """
+    batch = {kind: [] for kind in WATCH_KINDS}
+    size = 0
+    for kind in WATCH_KINDS:
+        for path in watches.get(kind, ()):
+            path_size = 4 + len(path.encode('utf-8'))
+            if size and size + path_size > max_bytes:
+                yield batch
+                batch = {kind: [] for kind in WATCH_KINDS}
+                size = 0
+            batch[kind].append(path)
+            size += path_size
+    if size:
+        yield batch
+
+
+class WatchRegistry:
+    """
+    Keeps track of local watch callbacks and of the watches set on the
+    server for them.
+
+    One-shot watches are set on the server as a side effect of requests
+    sent with ``watch=True`` and removed by the server once they trigger.
+    Callbacks are registered per ``(event type, path)``, callbacks of
+    persistent watches per ``(mode, path)``.
+
+    Contains attributes:
+
+    - **callbacks** Callbacks of one-shot watches.
+    - **persistent** Callbacks of persistent watches, called with the whole
+      ``WatchEvent``.
+    - **server_watches** ``(watcher type, path)`` of the one-shot watches
+      that may be set on the server, the watcher type being
+      ``RemoveWatchesRequest.DATA`` or ``RemoveWatchesRequest.CHILDREN``.
+    - **listeners** Called synchronously with every watch event on a
+      znode, once the triggered server watches are forgotten and before
+      any callback, e.g. to invalidate caches.
+    """
+
+    def __init__(self):
+        self.callbacks = collections.defaultdict(set)
+        self.persistent = collections.defaultdict(set)
+        self.server_watches = set()
+        self.listeners = []
+
+    def add_callback(self, event_type, path, callback):
+        self.callbacks[event_type, path].add(callback)
+
+    def remove_callback(self, event_type, path, callback):
+        """
+        Removes the callback and returns the watcher types of the server
+        watches on the path that are left without any callback.
+        """
+        callbacks = self.callbacks.get((event_type, path))
+        if callbacks is None:
+            return []
+        callbacks.discard(callback)
+        if callbacks:
+            return []
+        del self.callbacks[event_type, path]
+
+        orphaned = []
+        for watcher_type, event_types in EVENT_TYPES.items():
+            if event_type not in event_types or (watcher_type, path) not in self.server_watches:
+                continue
+            if any((other_type, path) in self.callbacks for other_type in event_types):
+                continue
+            self.server_watches.discard((watcher_type, path))
+            orphaned.append(watcher_type)
+        return orphaned
+
+    def add_persistent(self, mode, path, callback):
+        self.persistent[mode, path].add(callback)
+
+    def remove_persistent(self, mode, path, callback):
+        """
+        Returns True if no callbacks are left for the watch.
+        """
+        callbacks = self.persistent.get((mode, path))
+        if callbacks is None:
+            return True
+        callbacks.discard(callback)
+        if not callbacks:
+            del self.persistent[mode, path]
+            return True
+        return False
+
+    def has_callbacks(self, path):
+        """
+        Returns True if any one-shot or persistent callback is registered
+        for the path itself.
+        """
+        return any((event_type, path) in self.callbacks for event_type in WATCHED_EVENT_TYPES) or any(
+            (mode, path) in self.persistent for mode in PERSISTENT_MODES
+        )
+
+    def forget_server_watches(self, path):
+        for watcher_type in EVENT_TYPES:
+            self.server_watches.discard((watcher_type, path))
+
+    def track(self, request):
+        """
+        Records the server watches set by a request.
+        """
+        for request in getattr(request, 'requests', None) or (request,):
+            if not getattr(request, 'watch', False):
+                continue
+            if isinstance(request, (protocol.GetChildrenRequest, protocol.GetChildren2Request)):
+                self.server_watches.add((RemoveWatchesRequest.CHILDREN, request.path))
+            else:
+                self.server_watches.add((RemoveWatchesRequest.DATA, request.path))
+
+    def event_callbacks(self, event):
+        """
+        Returns the callbacks to call for a watch event, forgetting the
+        server watches it triggered.
+        """
+        for watcher_type, event_types in EVENT_TYPES.items():
+            if event.type in event_types:
+                self.server_watches.discard((watcher_type, event.path))
+
+        return self.callbacks.get((event.type, event.path), ())
+
+    def persistent_callbacks(self, event):
+        if not self.persistent:
+            return ()
+
+        callbacks = set(self.persistent.get((protocol.AddWatchRequest.PERSISTENT, event.path), ()))
+
+        # recursive watches trigger on the path and all of its descendants
+        path = event.path
+        while True:
+            callbacks.update(self.persistent.get((protocol.AddWatchRequest.PERSISTENT_RECURSIVE, path), ()))
+            if path == '/':
+                break
+            path = path.rsplit('/', 1)[0] or '/'
+
+        return callbacks
+
+    def restore(self):
+        """
+        Returns the watches to set again on a new connection, as keyword
+        arguments of `protocol.SetWatches2Request`.
+
+        Only watches with callbacks are restored, the server watches are
+        reset to them.
+        """
+        data_watches = {}
+        exist_watches = {}
+        child_watches = {}
+        for event_type, path in self.callbacks:
+            if event_type == WatchEvent.CREATED:
+                exist_watches[path] = None
+            elif event_type == WatchEvent.CHILDREN_CHANGED:
+                child_watches[path] = None
+            else:
+                # a data watch triggers on the deletion of the znode, and
+                # right away if it was deleted while disconnected
+                data_watches[path] = None
+
+        self.server_watches = {(RemoveWatchesRequest.DATA, path) for path in (*data_watches, *exist_watches)}
+        self.server_watches.update((RemoveWatchesRequest.CHILDREN, path) for path in child_watches)
+
+        persistent_watches = []
+        persistent_recursive_watches = []
+        for mode, path in self.persistent:
+            if mode == protocol.AddWatchRequest.PERSISTENT_RECURSIVE:
+                persistent_recursive_watches.append(path)
+            else:
+                persistent_watches.append(path)
+
+        return {
+            'data_watches': list(data_watches),
+            'exist_watches': list(exist_watches),
+            'child_watches': list(child_watches),
+            'persistent_watches': persistent_watches,
+            'persistent_recursive_watches': persistent_recursive_watches,
+        }
+
+    def stats(self):
+        """
+        Returns a dict with the number of watched keys and callbacks.
+        """
+        return {
+            'watches': len(self.callbacks),
+            'callbacks': sum(len(callbacks) for callbacks in self.callbacks.values()),
+            'persistent_watches': len(self.persistent),
+            'persistent_callbacks': sum(len(callbacks) for callbacks in self.persistent.values()),
+            'server_watches': len(self.server_watches),
+        }
@@ -0,0 +1,91 @@
+import asyncio
+import collections
+import logging
+
+
+log = logging.getLogger(__name__)
+
+
+class RequestWindow:
+    """
+    Limits the number of requests in flight at the same time.
+
+    Callers that find the window full are queued and let in strictly in
+    the order they arrived.  Used as an async context manager around
+    sending a request and awaiting its reply.
+
+    Contains attributes:
+
+    - **max_in_flight** Maximum number of requests in flight, ``None``
+      for no limit.
+    - **in_flight** Number of requests currently in flight.
+    - **max_queue_depth** Highest number of callers waiting at once.
+    - **queued_total** Number of callers that had to wait for room.
+    """
+
+    def __init__(self, max_in_flight=None):
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+        self.waiters = collections.deque()
+
+        self.max_queue_depth = 0
+        self.queued_total = 0
+
+    @property
+    def queue_depth(self):
+        """Number of callers currently waiting for room in the window."""
+        return len(self.waiters)
+
+    def has_room(self):
+        return self.max_in_flight is None or self.in_flight < self.max_in_flight
+
+    async def acquire(self):
+        if not self.waiters and self.has_room():
+            self.in_flight += 1
+            return
+
+        loop = asyncio.get_running_loop()
+        f = loop.create_future()
+        self.waiters.append(f)
+        self.queued_total += 1
+        self.max_queue_depth = max(self.max_queue_depth, len(self.waiters))
+
+        try:
+            await f
+        except asyncio.CancelledError:
+            if f.done() and not f.cancelled():
+                # room was handed over right before the cancellation
+                self.release()
+            else:
+                self.waiters.remove(f)
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+
+        while self.waiters and self.has_room():
+            f = self.waiters.popleft()
+            if f.done():
+                continue
+            self.in_flight += 1
+            f.set_result(None)
+
+    def stats(self):
+        """
+        Returns a dict with the current state of the window.
+        """
+        return {
+            'max_in_flight': self.max_in_flight,
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'queued_total': self.queued_total,
+        }
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exception, tb):
+        self.release()